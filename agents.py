@@ -4,13 +4,36 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from crewai import Agent  # BUG FIX 1: was "from crewai.agents import Agent" — wrong import path in crewai
-from tools import search_tool, FinancialDocumentTool
+from tools import FinancialDocumentTool
 
 ### Loading LLM
 # BUG FIX 2: llm = llm is a self-referential assignment that causes NameError.
 # Must initialise the LLM properly using LiteLLM/ChatOpenAI or crewai's built-in LLM wrapper.
 from crewai import LLM
-llm = LLM(model="gpt-4o", api_key=os.getenv("OPENAI_API_KEY"))
+from llm_gateway import LLMGateway, configure_http_pool, rate_limiter, response_memo
+if os.getenv("ANALYZER_LLM_BACKEND", "openai") == "stub":
+    # Deterministic offline LLM for benchmarks and local runs; see stub_llm.py.
+    from stub_llm import StubLLM
+    backend = StubLLM(
+        latency_seconds=float(os.getenv("ANALYZER_STUB_LATENCY_MS", "0")) / 1000,
+        failure_rate=float(os.getenv("ANALYZER_STUB_FAILURE_RATE", "0")),
+    )
+else:
+    configure_http_pool()
+    # The gateway retries with backoff; litellm's own retries would multiply them.
+    backend = LLM(model="gpt-4o", api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+
+# Every agent (and every per-request copy of it) calls the LLM through one
+# gateway: a process-wide rate limit, retries with jittered backoff and a
+# memo of identical calls; see llm_gateway.py.
+llm = LLMGateway(
+    backend,
+    limiter=rate_limiter,
+    memo=response_memo,
+    max_retries=int(os.getenv("ANALYZER_LLM_MAX_RETRIES", "4")),
+    backoff_seconds=float(os.getenv("ANALYZER_LLM_BACKOFF_SECONDS", "1")),
+    backoff_max_seconds=float(os.getenv("ANALYZER_LLM_BACKOFF_MAX_SECONDS", "30")),
+)
 
 # Creating an Experienced Financial Analyst agent
 # BUG FIX 3 (Prompt): Goal and backstory were instructing the agent to fabricate advice,
@@ -34,11 +57,14 @@ financial_analyst = Agent(
         "You present findings clearly, highlight material risks transparently, "
         "and always remind users to consult a licensed financial advisor before making investment decisions."
     ),
-    tools=[FinancialDocumentTool.read_data_tool],  # BUG FIX 4: was "tool=" (typo/singular)
+    tools=[FinancialDocumentTool.search_document_tool, FinancialDocumentTool.lookup_figures_tool],  # BUG FIX 4: was "tool=" (typo/singular)
     llm=llm,
     max_iter=5,   # BUG FIX 5: max_iter=1 means the agent gives up after one attempt; raised to 5
-    max_rpm=10,   # BUG FIX 6: max_rpm=1 is extremely restrictive; raised to 10
-    allow_delegation=True
+    # BUG FIX 6: max_rpm=1 was extremely restrictive. Per-agent limits are gone;
+    # the shared limit in llm_gateway.py (ANALYZER_LLM_RPM) covers every agent.
+    # Each task runs in a one-agent crew (see pipeline.py), so there is no
+    # coworker to delegate to; the pipeline's stage graph does the hand-offs.
+    allow_delegation=False
 )
 
 # Creating a document verifier agent
@@ -63,8 +89,7 @@ verifier = Agent(
     ),
     llm=llm,
     max_iter=5,   # BUG FIX 5 (same as above)
-    max_rpm=10,
-    allow_delegation=True
+    allow_delegation=False  # one-agent crew, as above
 )
 
 # BUG FIX 8 (Prompt): investment_advisor goal and backstory encouraged selling sketchy products,
@@ -87,7 +112,6 @@ investment_advisor = Agent(
     ),
     llm=llm,
     max_iter=5,
-    max_rpm=10,
     allow_delegation=False
 )
 
@@ -111,6 +135,5 @@ risk_assessor = Agent(
     ),
     llm=llm,
     max_iter=5,
-    max_rpm=10,
     allow_delegation=False
 )
\ No newline at end of file
@@ -0,0 +1,147 @@
+"""Benchmark the full /analyze pipeline offline with the deterministic stub LLM.
+
+Drives the FastAPI app in-process (httpx ASGI transport, no network and no
+API key) with synthetic filings at each page count and concurrency level.
+It reports p50/p95 request latency, requests per second, extraction time
+per page and the peak process RSS seen by the request traces.
+
+The document cache and the LLM response memo are disabled by default so
+every request parses and runs every task; pass --warm-cache to measure
+repeat uploads instead. The LLM rate limit is lifted unless --llm-rpm is
+given, since the stub has no quota to protect.
+
+Usage:
+    python benchmarks/bench_api.py --pages 1,100,1000 --concurrency 1,4,16 --requests 16 --latency-ms 50
+"""
+## Importing libraries and files
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic_pdf import build_pdf
+
+
+def configure(args, cache_dir: str) -> None:
+    """Environment for the app; must be set before main is imported."""
+    os.environ["ANALYZER_LLM_BACKEND"] = "stub"
+    os.environ["ANALYZER_STUB_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["ANALYZER_CACHE_DIR"] = cache_dir
+    if not args.warm_cache:
+        os.environ["ANALYZER_CACHE_MAX_MB"] = "0"  # every entry is evicted as soon as it is written
+        os.environ["ANALYZER_LLM_MEMO_ENTRIES"] = "0"
+    os.environ["ANALYZER_LLM_RPM"] = str(args.llm_rpm)
+    workers = max(args.concurrency)
+    os.environ.setdefault("ANALYZER_MAX_WORKERS", str(workers))
+    os.environ.setdefault("ANALYZER_MAX_QUEUE", str(workers))
+    os.environ.setdefault("ANALYZER_LLM_CONCURRENCY", str(workers))
+    os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+    os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+
+
+async def run_level(client, pdf: bytes, concurrency: int, requests: int):
+    """Send ``requests`` analyses with at most ``concurrency`` in flight."""
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with slots:
+            start = time.perf_counter()
+            response = await client.post(
+                "/analyze",
+                data={"include_trace": "true"},
+                files={"file": ("synthetic.pdf", pdf, "application/pdf")},
+            )
+            return time.perf_counter() - start, response
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one() for _ in range(requests)))
+    return time.perf_counter() - start, results
+
+
+def summarise(pages: int, concurrency: int, elapsed: float, results) -> dict:
+    latencies = np.array([latency for latency, _ in results])
+    ok = [response.json() for _, response in results if response.status_code == 200]
+    extraction = [
+        span["seconds"]
+        for body in ok
+        for span in body["trace"]["spans"]
+        if span["name"] == "extraction" and not span.get("cached")
+    ]
+    return {
+        "pages": pages,
+        "concurrency": concurrency,
+        "requests": len(results),
+        "ok": sum(body["status"] == "success" for body in ok),
+        "p50_s": float(np.percentile(latencies, 50)),
+        "p95_s": float(np.percentile(latencies, 95)),
+        "rps": len(results) / elapsed,
+        "extract_ms_per_page": float(np.median(extraction)) / pages * 1000 if extraction else float("nan"),
+        "peak_rss_mib": max((body["trace"]["peak_rss_bytes"] for body in ok), default=0) / (1024 * 1024),
+    }
+
+
+async def run(args) -> list:
+    import httpx
+    import main as app_module
+
+    # The ASGI transport does not run the app's lifespan, so build the crew
+    # here rather than inside the first level's timings (bench_startup.py
+    # measures cold starts).
+    app_module.crew_template()
+    rows = []
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for pages in args.pages:
+            pdf = build_pdf(pages, seed=pages)
+            for concurrency in args.concurrency:
+                # The crew logs every step to stdout; keep the report readable.
+                with contextlib.redirect_stdout(io.StringIO()):
+                    elapsed, results = await run_level(client, pdf, concurrency, args.requests)
+                row = summarise(pages, concurrency, elapsed, results)
+                rows.append(row)
+                print(
+                    f"{row['pages']:>6} {row['concurrency']:>5} {row['ok']:>3}/{row['requests']:<3} "
+                    f"{row['p50_s']:>8.3f} {row['p95_s']:>8.3f} {row['rps']:>7.2f} "
+                    f"{row['extract_ms_per_page']:>10.2f} {row['peak_rss_mib']:>9.1f}",
+                    flush=True,
+                )
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", default="1,10,100,1000", help="comma-separated page counts")
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=16, help="requests per level")
+    parser.add_argument("--latency-ms", type=float, default=50, help="stub LLM latency per call")
+    parser.add_argument("--warm-cache", action="store_true", help="keep the document cache and LLM memo enabled")
+    parser.add_argument("--llm-rpm", type=float, default=0, help="shared LLM calls per minute (0: unlimited)")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+    args.pages = [int(p) for p in args.pages.split(",")]
+    args.concurrency = [int(c) for c in args.concurrency.split(",")]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure(args, os.path.join(tmp, "cache"))
+        # The app writes uploads to ./data; keep them in the temporary directory.
+        os.chdir(tmp)
+        print(f"stub latency {args.latency_ms:g} ms/call, {args.requests} requests per level")
+        print(f"{'pages':>6} {'conc':>5} {'ok':>7} {'p50 s':>8} {'p95 s':>8} {'req/s':>7} {'ms/page':>10} {'peak MiB':>9}")
+        rows = asyncio.run(run(args))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Benchmark PDF text extraction: time and peak memory against page count.
+
+Compares the original whole-document extraction (``PyPDFLoader.load()``,
+``+=`` concatenation and the repeated ``replace`` loop) with the streaming
+and the multi-process extractors in extraction.py on synthetic filings.
+The ``tables`` row times the separate pass that recovers the statement
+tables (layout mode over the pages the text pass flagged as tabular),
+which a document pays for only when a tool first asks for figures.
+Peak memory of the parallel extractors covers the parent process only.
+
+Usage:
+    python benchmarks/bench_extraction.py --pages 10,100,500
+"""
+## Importing libraries and files
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_community.document_loaders import PyPDFLoader
+
+from extraction import extract_facts, extract_text
+from synthetic_pdf import write_pdf
+
+
+def legacy_extract_text(path: str) -> str:
+    """The extraction read_data_tool used before the streaming extractor."""
+    docs = PyPDFLoader(file_path=path).load()
+    full_report = ""
+    for data in docs:
+        content = data.page_content
+        while "\n\n" in content:
+            content = content.replace("\n\n", "\n")
+        full_report += content + "\n"
+    return full_report
+
+
+def measure(fn, path: str):
+    """Return ``(seconds, peak_bytes, text)`` for one extraction run."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    text = fn(path)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", default="10,50,100,250,500", help="comma-separated page counts")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Warm up imports and pypdf's font handling so the first row is fair.
+        warmup = write_pdf(os.path.join(tmp, "warmup.pdf"), 1)
+        legacy_extract_text(warmup)
+        extract_text(warmup, parallel=False)
+
+    print(f"{'pages':>6} {'impl':>10} {'seconds':>9} {'ms/page':>8} {'peak MiB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in (int(p) for p in args.pages.split(",")):
+            path = write_pdf(os.path.join(tmp, f"synthetic_{pages}.pdf"), pages)
+            results = {}
+            tabular_pages = []
+            extract_text(path, parallel=False, tabular_pages=tabular_pages)
+            for name, fn in (
+                ("legacy", legacy_extract_text),
+                ("streaming", lambda p: extract_text(p, parallel=False)),
+                ("parallel", extract_text),
+                ("tables", lambda p: extract_facts(p, tabular_pages=tabular_pages)),
+            ):
+                elapsed, peak, text = measure(fn, path)
+                if isinstance(text, str):
+                    results[name] = text
+                print(
+                    f"{pages:>6} {name:>10} {elapsed:>9.3f} {elapsed / pages * 1000:>8.2f} "
+                    f"{peak / (1024 * 1024):>9.2f}"
+                )
+            if len(set(results.values())) > 1:
+                print(f"WARNING: outputs differ for {pages} pages", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Benchmark the rule-based risk scorer on a synthetic 500-page filing.
+
+Text is generated directly from the synthetic page templates (no PDF
+parsing), so the timing covers only the risk-language scan, the line-item
+extraction and the threshold rules.
+
+The synthetic filings print capital expenditures as positive figures.
+Filed statements print them as outflows in parentheses, so the script
+first checks the rules against such a statement (CASH_FLOW_STATEMENT),
+and against the controls and going-concern boilerplate of a clean filing
+(CLEAN_DISCLOSURES), which must not read as critical disclosures.
+
+Usage:
+    python benchmarks/bench_risk.py --pages 500 --repeat 5
+"""
+## Importing libraries and files
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from risk import assess_risk, format_register, overall_rating
+from synthetic_pdf import page_lines
+
+BUDGET_SECONDS = 1.0
+
+# Laid out as in a 10-K: outflows in parentheses, "$" apart from the figure.
+# Operating cash flow of 1,000 against 3,000 of capex is negative free cash flow.
+CASH_FLOW_STATEMENT = """\
+CONSOLIDATED STATEMENTS OF CASH FLOWS
+(In millions)
+                                                        Year Ended December 31,
+                                                          2025          2024
+Cash flows from operating activities:
+  Net income                                        $      412    $      655
+  Depreciation and amortization                            890           845
+  Changes in operating assets and liabilities             (302)         (100)
+Net cash provided by operating activities                1,000         1,400
+Cash flows from investing activities:
+  Purchases of property and equipment                   (3,000)       (2,500)
+  Proceeds from sales of investments                       150           120
+Net cash used in investing activities                   (2,850)       (2,380)
+"""
+
+# Item 9A and going-concern evaluation wording found in most 10-Ks; none of
+# it discloses a problem. The last sentence of AFFIRMATIVE_DISCLOSURES does.
+CLEAN_DISCLOSURES = """\
+Item 9A. Controls and Procedures
+A material weakness is a deficiency, or a combination of deficiencies, in internal
+control over financial reporting. Based on this evaluation, management concluded that
+there were no material weaknesses and that our internal control over financial
+reporting was effective as of December 31, 2025.
+Going Concern
+In accordance with ASC 205-40, management evaluated whether there are conditions or
+events that raise substantial doubt about the Company's ability to continue as a going
+concern within one year. Management did not identify any substantial doubt about the
+Company's ability to continue as a going concern.
+"""
+AFFIRMATIVE_DISCLOSURES = CLEAN_DISCLOSURES + """\
+These recurring losses raise substantial doubt about our ability to continue as a going concern.
+"""
+
+
+def check_negated_disclosures() -> bool:
+    """Whether boilerplate denying a going-concern doubt or material weakness is not rated High."""
+    ratings = {item.category: item.rating for item in assess_risk(CLEAN_DISCLOSURES)}
+    affirmative = {item.category: item.rating for item in assess_risk(AFFIRMATIVE_DISCLOSURES)}
+    ok = ratings["liquidity"] != "High" and ratings["regulatory"] != "High" and affirmative["liquidity"] == "High"
+    print(f"negated disclosures: {'ok' if ok else 'FAIL'}")
+    if not ok:
+        print(format_register(assess_risk(CLEAN_DISCLOSURES)), file=sys.stderr)
+    return ok
+
+
+def check_parenthesised_capex() -> bool:
+    """Whether capex printed as "(3,000)" still counts against free cash flow."""
+    register = format_register(assess_risk(CASH_FLOW_STATEMENT))
+    ok = "negative free cash flow (-2,000)" in register
+    print(f"parenthesised capex: {'ok' if ok else 'FAIL'}")
+    if not ok:
+        print(register, file=sys.stderr)
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if not (check_parenthesised_capex() & check_negated_disclosures()):
+        sys.exit(1)
+
+    text = "\n".join("\n".join(page_lines(number)) for number in range(args.pages))
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        register = assess_risk(text)
+        timings.append(time.perf_counter() - start)
+
+    median = statistics.median(timings)
+    print(f"pages={args.pages} chars={len(text):,} overall={overall_rating(register)}")
+    print(f"median={median:.3f}s min={min(timings):.3f}s max={max(timings):.3f}s budget={BUDGET_SECONDS:.1f}s")
+    if median >= BUDGET_SECONDS:
+        print("FAIL: risk scoring exceeded its time budget", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
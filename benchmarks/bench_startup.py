@@ -0,0 +1,130 @@
+"""Benchmark server cold start: import time, first response and first analysis.
+
+Each run starts a fresh interpreter (as an autoscaled pod or a new uvicorn
+worker would), imports main.py, enters the app's lifespan and measures the
+time to the first health-check response, to the crew being built and to
+the first completed /analyze of a one-page filing. It also lists which of
+the heavy libraries (crewai, crewai_tools, langchain_community, litellm)
+the import of main.py pulled in. Runs use the deterministic stub LLM, so
+no network access or API key is needed.
+
+Both startup modes are measured: with the crew preloaded in the background
+(``ANALYZER_PRELOAD_CREW=true``, the default) and built by the first request.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 5
+"""
+## Importing libraries and files
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("crewai", "crewai_tools", "langchain_community", "litellm")
+
+
+def child(preload: bool) -> dict:
+    """One cold start, measured inside the fresh interpreter."""
+    os.environ["ANALYZER_LLM_BACKEND"] = "stub"
+    os.environ["ANALYZER_PRELOAD_CREW"] = "true" if preload else "false"
+    os.environ["ANALYZER_CACHE_MAX_MB"] = "0"
+    os.environ.setdefault("ANALYZER_LLM_RPM", "0")
+    os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+    os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+    sys.path.insert(0, ROOT)
+    sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+    started = time.perf_counter()
+    import main
+
+    imported = time.perf_counter()
+    heavy = [name for name in HEAVY_MODULES if name in sys.modules]
+
+    from fastapi.testclient import TestClient
+    from synthetic_pdf import build_pdf
+
+    pdf = build_pdf(1, seed=1)
+    with TestClient(main.app) as client:
+        client.get("/")
+        first_response = time.perf_counter()
+        while preload and not client.get("/").json()["crew_ready"]:
+            time.sleep(0.01)
+        ready = time.perf_counter() if preload else None
+        # The crew logs every step to stdout, which carries the result here.
+        with contextlib.redirect_stdout(io.StringIO()):
+            response = client.post("/analyze", files={"file": ("synthetic.pdf", pdf, "application/pdf")})
+        first_analysis = time.perf_counter()
+
+    return {
+        "preload": preload,
+        "import_s": imported - started,
+        "first_response_s": first_response - started,
+        "crew_ready_s": ready - started if ready is not None else float("nan"),
+        "first_analysis_s": first_analysis - started,
+        "status": response.json().get("status", response.status_code),
+        "heavy_modules": heavy,
+    }
+
+
+def cold_start(preload: bool) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        # The app writes uploads to ./data; keep them in the temporary directory.
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", "on" if preload else "off"],
+            cwd=tmp,
+            env={**os.environ, "ANALYZER_CACHE_DIR": os.path.join(tmp, "cache")},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3, help="cold starts per mode")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--child", choices=("on", "off"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(child(args.child == "on")))
+        return
+
+    print(f"median of {args.runs} cold starts, seconds from the start of 'import main'")
+    print(f"{'preload':>8} {'import':>8} {'first GET':>10} {'crew ready':>11} {'1st analysis':>13}  heavy modules after import")
+    rows = []
+    for preload in (True, False):
+        runs = [cold_start(preload) for _ in range(args.runs)]
+        row = {
+            "preload": preload,
+            **{
+                key: float(np.median([run[key] for run in runs]))
+                for key in ("import_s", "first_response_s", "crew_ready_s", "first_analysis_s")
+            },
+            "statuses": [run["status"] for run in runs],
+            "heavy_modules": runs[0]["heavy_modules"],
+        }
+        rows.append(row)
+        print(
+            f"{'on' if preload else 'off':>8} {row['import_s']:>8.2f} {row['first_response_s']:>10.2f} "
+            f"{row['crew_ready_s']:>11.2f} {row['first_analysis_s']:>13.2f}  "
+            f"{', '.join(row['heavy_modules']) or 'none'}",
+            flush=True,
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
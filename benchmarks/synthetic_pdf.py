@@ -0,0 +1,171 @@
+## Importing libraries and files
+import random
+from typing import List
+
+# Page templates cycled through to make a document that looks like a filing:
+# narrative sections, statement tables with two periods, and risk factors.
+_SECTIONS = [
+    (
+        "MANAGEMENT'S DISCUSSION AND ANALYSIS OF FINANCIAL CONDITION",
+        [
+            "Total revenues increased {pct}% year-over-year, driven by higher deliveries",
+            "and growth in our energy generation and storage business.",
+            "Operating expenses were {opex} million, reflecting continued investment in R&D.",
+            "Free cash flow for the period was {fcf} million.",
+        ],
+    ),
+    (
+        "CONSOLIDATED STATEMENTS OF OPERATIONS (in millions)",
+        [
+            "                                   2025        2024",
+            "Total revenues                 {rev:>9,}   {rev_prev:>9,}",
+            "Cost of revenues               {cogs:>9,}   {cogs_prev:>9,}",
+            "Gross profit                   {gp:>9,}   {gp_prev:>9,}",
+            "Net income                     {ni:>9,}   {ni_prev:>9,}",
+            "Diluted EPS                    {eps:>9}   {eps_prev:>9}",
+        ],
+    ),
+    (
+        "CONSOLIDATED BALANCE SHEETS (in millions)",
+        [
+            "                                   2025        2024",
+            "Cash and cash equivalents      {cash:>9,}   {cash_prev:>9,}",
+            "Total current assets           {ca:>9,}   {ca_prev:>9,}",
+            "Total assets                   {ta:>9,}   {ta_prev:>9,}",
+            "Total current liabilities      {cl:>9,}   {cl_prev:>9,}",
+            "Total debt                     {debt:>9,}   {debt_prev:>9,}",
+            "Total stockholders' equity     {eq:>9,}   {eq_prev:>9,}",
+        ],
+    ),
+    (
+        "CONSOLIDATED STATEMENTS OF CASH FLOWS (in millions)",
+        [
+            "                                   2025        2024",
+            "Net cash provided by operating activities  {ocf:>9,}   {ocf_prev:>9,}",
+            "Capital expenditures           {capex:>9,}   {capex_prev:>9,}",
+        ],
+    ),
+    (
+        "RISK FACTORS",
+        [
+            "We face intense competition and pricing pressure in our markets.",
+            "Our indebtedness could adversely affect our liquidity and financial condition.",
+            "Supply chain disruptions and shortages of components may delay production.",
+            "Fluctuations in foreign currency exchange rates could harm our results.",
+            "We are subject to litigation and regulatory investigations.",
+        ],
+    ),
+]
+
+
+def _figures(rng: random.Random) -> dict:
+    rev = rng.randint(15000, 30000)
+    rev_prev = int(rev * rng.uniform(0.8, 1.1))
+    figures = {
+        "pct": rng.randint(-5, 25),
+        "opex": rng.randint(2000, 4000),
+        "fcf": rng.randint(-500, 2500),
+        "rev": rev,
+        "rev_prev": rev_prev,
+        "cogs": int(rev * 0.8),
+        "cogs_prev": int(rev_prev * 0.8),
+        "ni": int(rev * rng.uniform(0.02, 0.12)),
+        "ni_prev": int(rev_prev * rng.uniform(0.02, 0.12)),
+        "eps": f"{rng.uniform(0.1, 2.0):.2f}",
+        "eps_prev": f"{rng.uniform(0.1, 2.0):.2f}",
+        "cash": rng.randint(10000, 20000),
+        "cash_prev": rng.randint(10000, 20000),
+        "ca": rng.randint(40000, 60000),
+        "ca_prev": rng.randint(40000, 60000),
+        "ta": rng.randint(100000, 130000),
+        "ta_prev": rng.randint(90000, 120000),
+        "cl": rng.randint(25000, 35000),
+        "cl_prev": rng.randint(25000, 35000),
+        "debt": rng.randint(5000, 15000),
+        "debt_prev": rng.randint(5000, 15000),
+        "eq": rng.randint(60000, 75000),
+        "eq_prev": rng.randint(55000, 70000),
+        "ocf": rng.randint(1000, 5000),
+        "ocf_prev": rng.randint(1000, 5000),
+        "capex": rng.randint(2000, 3000),
+        "capex_prev": rng.randint(2000, 3000),
+    }
+    figures["gp"] = figures["rev"] - figures["cogs"]
+    figures["gp_prev"] = figures["rev_prev"] - figures["cogs_prev"]
+    return figures
+
+
+def page_lines(page_number: int, seed: int = 0) -> List[str]:
+    """Lines of text for one synthetic page."""
+    rng = random.Random(seed * 100003 + page_number)
+    title, template = _SECTIONS[page_number % len(_SECTIONS)]
+    figures = _figures(rng)
+    lines = [f"Example Motors, Inc. - Annual Report - Page {page_number + 1}", "", title, ""]
+    for _ in range(3):
+        lines.extend(line.format(**figures) for line in template)
+        lines.append("")
+    return lines
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def build_pdf(pages: int, seed: int = 0) -> bytes:
+    """Build a text-based PDF with ``pages`` pages of filing-like content.
+
+    The file is written by hand (one Courier font, one content stream per
+    page) so no PDF authoring library is needed.
+    """
+    objects: List[bytes] = []
+
+    def add(obj: bytes) -> int:
+        objects.append(obj)
+        return len(objects)
+
+    catalog_id = add(b"")  # filled in once the page tree exists
+    pages_id = add(b"")
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier >>")
+
+    page_ids = []
+    for number in range(pages):
+        ops = ["BT", "/F1 9 Tf", "11 TL", "40 760 Td"]
+        for line in page_lines(number, seed):
+            ops.append(f"({_escape(line)}) Tj T*")
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1")
+        content_id = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        page_ids.append(
+            add(
+                b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] "
+                b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+                % (pages_id, font_id, content_id)
+            )
+        )
+
+    kids = " ".join(f"{pid} 0 R" for pid in page_ids).encode()
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+    objects[catalog_id - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id
+
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+    xref_offset = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        catalog_id,
+        xref_offset,
+    )
+    return bytes(out)
+
+
+def write_pdf(path: str, pages: int, seed: int = 0) -> str:
+    """Write a synthetic PDF to ``path`` and return the path."""
+    with open(path, "wb") as f:
+        f.write(build_pdf(pages, seed))
+    return path
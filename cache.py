@@ -0,0 +1,257 @@
+## Importing libraries and files
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import IO, Any, Callable, Dict, Optional
+
+import numpy as np
+
+# Layers are stored and evicted independently so large extracted texts can
+# never push the (much smaller, much more expensive) task outputs out.
+TEXT_LAYER = "text"
+RESULTS_LAYER = "results"
+TABLES_LAYER = "tables"
+
+# Table facts are stored as .npy files so they can be memory-mapped instead
+# of read and decoded; everything else is JSON.
+_EXTENSIONS = {TEXT_LAYER: ".json", RESULTS_LAYER: ".json", TABLES_LAYER: ".npy"}
+
+# Tasks whose output does not depend on the user's query.
+QUERY_INDEPENDENT_TASKS = {"verification"}
+
+# Writes between full scans of a layer. In between, a running total of the
+# layer's size decides whether anything has to be evicted.
+SWEEP_EVERY_WRITES = 256
+
+logger = logging.getLogger(__name__)
+
+
+def hash_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Return the SHA-256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def normalize_query(query: str) -> str:
+    """Normalise a query so trivially different phrasings share a cache entry."""
+    query = " ".join(query.lower().split())
+    return re.sub(r"[\s?.!]+$", "", query)
+
+
+## Creating the content-addressed document cache
+class DocumentCache:
+    """On-disk cache of extracted PDF text, table facts and task outputs, keyed by file hash.
+
+    Each layer lives in its own directory under ``root`` and is bounded by
+    ``max_bytes``; entries written more than ``ttl_seconds`` ago are treated
+    as misses and removed, however often they are read. Least-recently-used
+    entries are evicted first: a file's mtime records when it was written and
+    its atime when it was last used.
+
+    The cache is best-effort: a failed write (disk full, read-only directory)
+    is logged and counted, and the request carries on without it.
+
+    Args:
+        root (str): Directory the cache is stored in.
+        max_bytes (int): Size budget per layer.
+        ttl_seconds (float): Lifetime of an entry; 0 disables expiry.
+    """
+
+    def __init__(self, root: str, max_bytes: int, ttl_seconds: float):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._stats = {
+            layer: {"hits": 0, "misses": 0, "writes": 0, "write_errors": 0, "evictions": 0}
+            for layer in _EXTENSIONS
+        }
+        # Running size of each layer (None until it has been scanned once) and
+        # writes since its last full scan.
+        self._sizes: Dict[str, Optional[int]] = {layer: None for layer in _EXTENSIONS}
+        self._unswept: Dict[str, int] = {layer: 0 for layer in _EXTENSIONS}
+
+    def get_text(self, doc_hash: str) -> Optional[str]:
+        entry = self._get(TEXT_LAYER, doc_hash)
+        return entry["text"] if entry is not None else None
+
+    def put_text(self, doc_hash: str, text: str) -> None:
+        self._put(TEXT_LAYER, doc_hash, _json_writer({"text": text}))
+
+    def get_facts(self, doc_hash: str) -> Optional[np.ndarray]:
+        """The document's table facts, memory-mapped read-only from the cache file."""
+        return self._get(TABLES_LAYER, doc_hash, _load_facts)
+
+    def put_facts(self, doc_hash: str, facts: np.ndarray) -> None:
+        self._put(TABLES_LAYER, doc_hash, lambda f: np.save(f, facts, allow_pickle=False), binary=True)
+
+    def get_result(self, doc_hash: str, query: str, task: str) -> Optional[str]:
+        entry = self._get(RESULTS_LAYER, self._result_key(doc_hash, query, task))
+        return entry["output"] if entry is not None else None
+
+    def put_result(self, doc_hash: str, query: str, task: str, output: str) -> None:
+        self._put(
+            RESULTS_LAYER,
+            self._result_key(doc_hash, query, task),
+            _json_writer({"task": task, "query": normalize_query(query), "output": output}),
+        )
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Hit/miss counters plus the current size of every layer."""
+        with self._lock:
+            stats = {layer: dict(counters) for layer, counters in self._stats.items()}
+        for layer, counters in stats.items():
+            files = self._list(layer)
+            counters["entries"] = len(files)
+            counters["bytes"] = sum(size for _, size, _, _ in files)
+        return stats
+
+    @staticmethod
+    def _result_key(doc_hash: str, query: str, task: str) -> str:
+        if task in QUERY_INDEPENDENT_TASKS:
+            query = ""
+        raw = f"{doc_hash}\0{normalize_query(query)}\0{task}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, layer: str, key: str) -> str:
+        return os.path.join(self.root, layer, key[:2], key + _EXTENSIONS[layer])
+
+    def _count(self, layer: str, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            self._stats[layer][counter] += amount
+
+    def _get(self, layer: str, key: str, load: Callable[[str], Any] = None) -> Optional[Any]:
+        path = self._path(layer, key)
+        try:
+            st = os.stat(path)
+            now = time.time()
+            if self.ttl_seconds and now - st.st_mtime > self.ttl_seconds:
+                os.remove(path)
+                self._count(layer, "evictions")
+                self._resize(layer, -st.st_size)
+                raise FileNotFoundError(path)
+            entry = (load or _load_json)(path)
+            # Bump recency (atime) for LRU eviction; the mtime keeps the write
+            # time so the TTL does not slide with every hit.
+            os.utime(path, (now, st.st_mtime))
+        except (OSError, ValueError):
+            self._count(layer, "misses")
+            return None
+        self._count(layer, "hits")
+        return entry
+
+    def _put(self, layer: str, key: str, write: Callable[[IO], None], binary: bool = False) -> None:
+        path = self._path(layer, key)
+        tmp_path = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temp file and rename so readers never see a partial entry.
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") if binary else os.fdopen(fd, "w", encoding="utf-8") as f:
+                write(f)
+            size = os.path.getsize(tmp_path)
+            try:
+                replaced = os.path.getsize(path)
+            except OSError:
+                replaced = 0
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning("Could not write %s cache entry %s: %s", layer, key, e)
+            self._count(layer, "write_errors")
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+            return
+        self._count(layer, "writes")
+        if self._resize(layer, size - replaced, write=True):
+            self._evict(layer)
+
+    def _resize(self, layer: str, delta: int, write: bool = False) -> bool:
+        """Adjust a layer's running size; True when it is time for a full scan.
+
+        A scan is due when the layer has never been scanned, is over budget,
+        or has had ``SWEEP_EVERY_WRITES`` writes since the last scan (which
+        also picks up entries written by other processes and expired ones).
+        """
+        with self._lock:
+            if self._sizes[layer] is not None:
+                self._sizes[layer] += delta
+            if write:
+                self._unswept[layer] += 1
+            return write and (
+                self._sizes[layer] is None
+                or self._sizes[layer] > self.max_bytes
+                or self._unswept[layer] >= SWEEP_EVERY_WRITES
+            )
+
+    def _list(self, layer: str):
+        """Return ``(path, size, mtime, atime)`` for every entry in a layer."""
+        files = []
+        for dirpath, _, filenames in os.walk(os.path.join(self.root, layer)):
+            for name in filenames:
+                if not name.endswith(_EXTENSIONS[layer]):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                files.append((path, st.st_size, st.st_mtime, st.st_atime))
+        return files
+
+    def _evict(self, layer: str) -> None:
+        files = self._list(layer)
+        now = time.time()
+        total = 0
+        evicted = 0
+        # Most recently used first: keep entries until the budget is exhausted.
+        for path, size, mtime, _ in sorted(files, key=lambda f: f[3], reverse=True):
+            expired = self.ttl_seconds and now - mtime > self.ttl_seconds
+            if expired or total + size > self.max_bytes:
+                try:
+                    os.remove(path)
+                    evicted += 1
+                except OSError:
+                    pass
+                continue
+            total += size
+        with self._lock:
+            self._sizes[layer] = total
+            self._unswept[layer] = 0
+        if evicted:
+            self._count(layer, "evictions", evicted)
+
+
+def _load_json(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _json_writer(entry: dict) -> Callable[[IO], None]:
+    return lambda f: json.dump(entry, f)
+
+
+def _load_facts(path: str) -> np.ndarray:
+    try:
+        return np.load(path, mmap_mode="r", allow_pickle=False)
+    except ValueError:
+        # A document without tables is an empty array, which cannot be mapped.
+        return np.load(path, allow_pickle=False)
+
+
+## Creating the shared cache instance
+document_cache = DocumentCache(
+    root=os.getenv("ANALYZER_CACHE_DIR", "cache"),
+    max_bytes=int(os.getenv("ANALYZER_CACHE_MAX_MB", "512")) * 1024 * 1024,
+    ttl_seconds=float(os.getenv("ANALYZER_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+)
@@ -0,0 +1,273 @@
+## Importing libraries and files
+import os
+import threading
+from contextlib import nullcontext
+from typing import Any, Callable, ContextManager, Dict, List, Optional
+
+import numpy as np
+
+from cache import DocumentCache, document_cache, hash_file
+from extraction import extract_facts, extract_text
+from metrics import RequestTrace
+from ratios import FinancialTable, extract_line_items
+from retrieval import DocumentIndex, format_results
+from tables import financial_table, format_facts, lookup
+
+
+## Creating the per-request parsed document
+class ParsedDocument:
+    """A PDF that is parsed at most once and shared by every tool call of a request.
+
+    When the document's SHA-256 is known, the extracted text and table facts
+    are looked up in (and written back to) the content-addressed cache, so
+    re-uploads of the same file skip parsing entirely.
+
+    Attributes:
+        path (str): Absolute path of the PDF file.
+        source_path (str): The path as given, e.g. relative as the tasks see it.
+        sha256 (str): Hex digest of the file contents, if known.
+        parse_count (int): Number of times the PDF's text has actually been extracted.
+        table_pass_count (int): Number of layout passes over the PDF to recover its tables.
+        read_count (int): Number of times the text has been handed to a tool.
+        search_count (int): Number of excerpt searches served from the index.
+        text_cache_hit (bool): Whether the text came from the cache.
+        facts_cache_hit (bool): Whether the table facts came from the cache.
+        trace (RequestTrace): Trace of the request the document belongs to, if any.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        sha256: Optional[str] = None,
+        cache: Optional[DocumentCache] = None,
+        trace: Optional[RequestTrace] = None,
+    ):
+        self.path = os.path.abspath(path)
+        self.source_path = path
+        self.sha256 = sha256
+        self.cache = cache
+        self.trace = trace
+        self.parse_count = 0
+        self.table_pass_count = 0
+        self.read_count = 0
+        self.search_count = 0
+        self.text_cache_hit = False
+        self.facts_cache_hit = False
+        self._text: Optional[str] = None
+        self._facts: Optional[np.ndarray] = None
+        # Pages that looked like tables during text extraction; unknown when
+        # the text came from the cache.
+        self._tabular_pages: Optional[List[int]] = None
+        self._index: Optional[DocumentIndex] = None
+        self._derived: Dict[str, Any] = {}
+        self._ok = False
+        self._lock = threading.Lock()
+
+    def load(self) -> str:
+        """Parse the PDF if that has not happened yet and return its text."""
+        with self._lock:
+            if self._text is None:
+                with self.span("extraction") as span:
+                    self._text = self._load_text()
+                    span["cached"] = self.text_cache_hit
+            return self._text
+
+    @property
+    def has_text(self) -> bool:
+        """Whether the PDF yielded usable text (parsing it if needed)."""
+        self.load()
+        return self._ok
+
+    def read(self) -> str:
+        """Return the document text for a tool call, parsing it on first use."""
+        text = self.load()
+        with self._lock:
+            self.read_count += 1
+        return text
+
+    def build_index(self) -> Optional[DocumentIndex]:
+        """Build the section-aware search index once; None if the PDF has no text."""
+        text = self.load()
+        with self._lock:
+            if self._index is None and self._ok:
+                with self.span("index_build"):
+                    self._index = DocumentIndex(text)
+            return self._index
+
+    def search(self, query: str, section: Optional[str] = None, top_k: int = 5) -> str:
+        """Return the ``top_k`` excerpts most relevant to ``query`` for a tool call."""
+        index = self.build_index()
+        with self._lock:
+            self.search_count += 1
+        if index is None:
+            return self.load()  # the error or warning explaining why there is no text
+        return format_results(index.search(query, top_k=top_k, section=section or None))
+
+    def facts(self) -> Optional[np.ndarray]:
+        """Figures recovered from the document's tables (see tables.py); None if the PDF has no text.
+
+        The layout pass behind them costs about as much again as the text
+        extraction, so it only runs on the first call: documents rejected by
+        the pre-check, and requests whose stages all come from the results
+        cache, never pay for it. Cached facts are memory-mapped instead.
+        """
+        self.load()
+        with self._lock:
+            if self._facts is None and self._ok:
+                with self.span("table_extraction") as span:
+                    self._facts = self._load_facts()
+                    span["cached"] = self.facts_cache_hit
+            return self._facts
+
+    def financial_table(self) -> Optional[FinancialTable]:
+        """Line items for the ratio and risk tools, from the tables when they have any.
+
+        Falls back to matching statement lines in the plain text. Computed
+        once per document; None if the PDF has no usable text.
+        """
+        facts = self.facts()
+
+        def build(text: str) -> FinancialTable:
+            table = financial_table(facts) if facts is not None else None
+            return table if table is not None else extract_line_items(text)
+
+        return self.derive("financial_table", build)
+
+    def lookup(self, line_item: str, period: str = "") -> str:
+        """Table rows matching ``line_item`` (and ``period``) for a tool call."""
+        facts = self.facts()
+        if facts is None:
+            return self.load()  # the error or warning explaining why there is no text
+        return format_facts(lookup(facts, line_item, period))
+
+    def derive(self, key: str, builder: Callable[[str], Any]) -> Any:
+        """Compute ``builder(text)`` once per document and reuse the result.
+
+        Used by the numeric tools so repeated calls within a request (and
+        retries by the agents) do not redo the extraction.
+
+        Returns:
+            The cached result, or None if the PDF has no usable text.
+        """
+        text = self.load()
+        with self._lock:
+            if not self._ok:
+                return None
+            if key not in self._derived:
+                self._derived[key] = builder(text)
+            return self._derived[key]
+
+    def span(self, name: str, **attrs: Any) -> ContextManager[Dict[str, Any]]:
+        """Time a block in the request's trace; a no-op for standalone documents."""
+        if self.trace is None:
+            return nullcontext(attrs)
+        return self.trace.span(name, **attrs)
+
+    def stats(self) -> Dict[str, int]:
+        """Counters reported back in the API response."""
+        return {
+            "parses": self.parse_count,
+            "table_passes": self.table_pass_count,
+            "tool_reads": self.read_count,
+            "tool_searches": self.search_count,
+            "text_cache_hit": self.text_cache_hit,
+            "table_facts": len(self._facts) if self._facts is not None else 0,
+        }
+
+    def _load_text(self) -> str:
+        if not os.path.exists(self.path):
+            return f"Error: File not found at '{self.path}'. Please provide a valid PDF path."
+
+        if self.cache is not None and self.sha256:
+            cached = self.cache.get_text(self.sha256)
+            if cached is not None:
+                self.text_cache_hit = True
+                self._ok = True
+                return cached
+
+        try:
+            self.parse_count += 1
+            tabular_pages: List[int] = []
+            text = extract_text(self.path, tabular_pages=tabular_pages)
+        except Exception as e:
+            return f"Error reading PDF: {str(e)}"
+
+        if not text.strip():
+            return "Warning: No extractable text found in the PDF. It may be a scanned image."
+
+        if self.cache is not None and self.sha256:
+            self.cache.put_text(self.sha256, text)
+        self._tabular_pages = tabular_pages
+        self._ok = True
+        return text
+
+    def _load_facts(self) -> np.ndarray:
+        if self.cache is not None and self.sha256:
+            cached = self.cache.get_facts(self.sha256)
+            if cached is not None:
+                self.facts_cache_hit = True
+                return cached
+        self.table_pass_count += 1
+        facts = extract_facts(self.path, tabular_pages=self._tabular_pages)
+        if self.cache is not None and self.sha256:
+            self.cache.put_facts(self.sha256, facts)
+        return facts
+
+
+## Registry of documents belonging to in-flight requests
+_documents: Dict[str, ParsedDocument] = {}
+_documents_lock = threading.Lock()
+
+
+def open_document(
+    path: str, sha256: Optional[str] = None, trace: Optional[RequestTrace] = None
+) -> ParsedDocument:
+    """Register a document for the duration of a request.
+
+    Tools resolve their ``path`` argument against this registry, so every
+    call made while the request runs shares a single parse (and records its
+    spans in the request's trace).
+
+    Args:
+        path (str): Path of the uploaded PDF.
+        sha256 (str, optional): Digest of the file; computed if not given.
+        trace (RequestTrace, optional): Trace of the request.
+    """
+    document = ParsedDocument(path, sha256=sha256 or hash_file(path), cache=document_cache, trace=trace)
+    with _documents_lock:
+        _documents[document.path] = document
+    return document
+
+
+def close_document(document: ParsedDocument) -> None:
+    """Drop a document from the registry once its request has finished."""
+    with _documents_lock:
+        if _documents.get(document.path) is document:
+            del _documents[document.path]
+
+
+def get_document(path: str) -> ParsedDocument:
+    """Return the registered document for ``path``.
+
+    Paths that are not part of an in-flight request (e.g. the default
+    ``data/sample.pdf``) get a standalone, unregistered document.
+    """
+    with _documents_lock:
+        document = _documents.get(os.path.abspath(path))
+    return document if document is not None else ParsedDocument(path)
+
+
+def registered_paths() -> Dict[str, str]:
+    """Map the paths of every in-flight document, as given and absolute, to its SHA-256.
+
+    Uploads are saved under a fresh name each time, so anything that keys on
+    prompt text (e.g. the LLM response memo) uses this to recognise the same
+    document behind different paths.
+    """
+    with _documents_lock:
+        documents = list(_documents.values())
+    paths = {}
+    for document in documents:
+        paths[document.path] = document.sha256
+        paths[document.source_path] = document.sha256
+    return paths
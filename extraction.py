@@ -0,0 +1,192 @@
+## Importing libraries and files
+import atexit
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Callable, Collection, FrozenSet, Iterator, List, Optional, Tuple
+
+import numpy as np
+from pypdf import PageObject, PdfReader
+
+from tables import PageLines, build_facts, looks_tabular, parse_layout
+
+# Any run of blank lines collapses to a single newline.
+_BLANK_LINES = re.compile(r"\n{2,}")
+
+# Documents with at least this many pages are split across a process pool.
+PARALLEL_PAGE_THRESHOLD = int(os.getenv("ANALYZER_PARALLEL_EXTRACTION_PAGES", "64"))
+# Worker processes for parallel extraction; 1 disables it.
+EXTRACTION_WORKERS = int(os.getenv("ANALYZER_EXTRACTION_WORKERS", "0")) or os.cpu_count() or 1
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+# Cleared in process-pool job workers (see jobs.py), which must not start a
+# pool of their own: their exit would wait on it.
+_parallel_allowed = True
+
+
+def normalize_page(content: str) -> str:
+    """Collapse runs of newlines in a page of text in a single linear pass."""
+    return _BLANK_LINES.sub("\n", content)
+
+
+def _page_text(page: PageObject) -> str:
+    # Same extraction PyPDFLoader performs for a page ("plain" mode, stripped),
+    # so the agents see identical text whichever path produced it.
+    return normalize_page(page.extract_text().strip())
+
+
+def _page_text_and_flag(page: PageObject) -> Tuple[str, bool]:
+    # The text pass notes which pages look tabular (a cheap regex), so the
+    # table pass can skip straight to those pages later.
+    text = _page_text(page)
+    return text, looks_tabular(text)
+
+
+def _page_tables(page: PageObject, tabular: Optional[FrozenSet[int]] = None) -> PageLines:
+    # Only pages with table-like lines pay for the layout-preserving pass.
+    # Without the text pass's list, the page's plain text decides.
+    if tabular is None:
+        wanted = looks_tabular(_page_text(page))
+    else:
+        wanted = page.page_number in tabular
+    return parse_layout(page.extract_text(extraction_mode="layout")) if wanted else []
+
+
+def iter_pages(path: str, page_fn: Callable[[PageObject], object] = _page_text) -> Iterator:
+    """Yield the normalised text (or ``page_fn``'s result) of each page of a PDF, one page at a time.
+
+    Each page's text is produced as it is needed instead of first loading a
+    ``Document`` per page as ``PyPDFLoader.load()`` did. This is not a memory
+    saving: ``PdfReader`` keeps the file and every page it has resolved until
+    the reader is dropped, so peak memory is about that of loading everything
+    (see benchmarks/bench_extraction.py). Opening a fresh reader per range of
+    pages to release them was measured slower and larger still.
+
+    Args:
+        path (str): Path of the PDF file.
+        page_fn (callable): What to extract from each page; the page text by default.
+    """
+    reader = PdfReader(path)
+    for page in reader.pages:
+        yield page_fn(page)
+
+
+def _extract_range(
+    path: str, start: int, stop: int, page_fn: Callable[[PageObject], object] = _page_text
+) -> List:
+    """Extract pages ``[start, stop)``; runs inside a worker process."""
+    reader = PdfReader(path)
+    return [page_fn(reader.pages[number]) for number in range(start, stop)]
+
+
+def _page_ranges(page_count: int, workers: int) -> List[Tuple[int, int]]:
+    # A few ranges per worker keeps the pool busy when pages vary in cost.
+    size = max(1, -(-page_count // (workers * 4)))
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # The pool is created lazily from a worker thread while other
+            # threads (stage pool, RSS sampler, HTTP clients) run; forking
+            # then can copy a held lock into the children, so workers are
+            # started from a clean forkserver (or spawned where that is missing).
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _pool = ProcessPoolExecutor(
+                max_workers=EXTRACTION_WORKERS, mp_context=multiprocessing.get_context(method)
+            )
+        return _pool
+
+
+def shutdown_pool() -> None:
+    """Stop the extraction worker processes, if any were started."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def disable_parallel_extraction() -> None:
+    """Extract every document in the calling process from now on."""
+    global _parallel_allowed
+    _parallel_allowed = False
+
+
+atexit.register(shutdown_pool)
+
+
+def iter_pages_parallel(path: str, page_fn: Callable[[PageObject], object] = _page_text) -> Iterator:
+    """Yield page texts (or ``page_fn``'s results) in page order, extracting page ranges in parallel.
+
+    Falls back to :func:`iter_pages` below ``PARALLEL_PAGE_THRESHOLD`` pages
+    or when only one extraction worker is configured, where the cost of
+    handing work to other processes outweighs the gain, and inside
+    process-pool job workers.
+
+    Args:
+        path (str): Path of the PDF file.
+        page_fn (callable): What to extract from each page; must be a
+            module-level function so it can be sent to the workers.
+    """
+    page_count = len(PdfReader(path).pages)
+    if not _parallel_allowed or EXTRACTION_WORKERS <= 1 or page_count < PARALLEL_PAGE_THRESHOLD:
+        yield from iter_pages(path, page_fn)
+        return
+
+    ranges = _page_ranges(page_count, EXTRACTION_WORKERS)
+    starts, stops = zip(*ranges)
+    # map() returns results in submission order, i.e. page order.
+    for pages in _get_pool().map(_extract_range, [path] * len(ranges), starts, stops, [page_fn] * len(ranges)):
+        yield from pages
+
+
+def extract_text(path: str, parallel: bool = True, tabular_pages: Optional[List[int]] = None) -> str:
+    """Extract the full text of a PDF file.
+
+    Args:
+        path (str): Path of the PDF file.
+        parallel (bool): Allow large documents to be split across processes.
+        tabular_pages (list, optional): If given, the 0-based numbers of the
+            pages that look like tables are appended to it, for
+            :func:`extract_facts`.
+
+    Returns:
+        str: Text of every page, each followed by a newline, with runs of
+        blank lines collapsed.
+    """
+    pages = iter_pages_parallel if parallel else iter_pages
+    parts = []
+    if tabular_pages is None:
+        for content in pages(path):
+            parts.append(content)
+            parts.append("\n")
+        return "".join(parts)
+
+    for number, (content, tabular) in enumerate(pages(path, _page_text_and_flag)):
+        parts.append(content)
+        parts.append("\n")
+        if tabular:
+            tabular_pages.append(number)
+    return "".join(parts)
+
+
+def extract_facts(
+    path: str, parallel: bool = True, tabular_pages: Optional[Collection[int]] = None
+) -> np.ndarray:
+    """Extract the table facts of a PDF (see ``tables.build_facts``).
+
+    Pages that look like tables are read again in layout mode, which keeps
+    the column positions. Pass the ``tabular_pages`` recorded by
+    :func:`extract_text` to read only those pages; otherwise every page's
+    plain text is extracted again to find them.
+    """
+    pages = iter_pages_parallel if parallel else iter_pages
+    tabular = frozenset(tabular_pages) if tabular_pages is not None else None
+    return build_facts(pages(path, partial(_page_tables, tabular=tabular)))
@@ -0,0 +1,190 @@
+## Importing libraries and files
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class QueueFullError(Exception):
+    """Raised when the worker pool and its waiting queue are both full."""
+
+
+## Creating the job record
+class Job:
+    """A unit of work submitted to the worker pool.
+
+    The status is derived from the underlying future, so it is accurate for
+    both thread and process pools.
+    """
+
+    def __init__(self, job_id: str, future: Future):
+        self.id = job_id
+        self.future = future
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    @property
+    def status(self) -> str:
+        if not self.future.done():
+            return "running" if self.future.running() else "queued"
+        return "failed" if self.error() is not None else "succeeded"
+
+    def error(self) -> Optional[str]:
+        """Why a finished job failed, or None if it succeeded or is still running.
+
+        ``Future.exception()`` raises ``CancelledError`` for a cancelled
+        future (e.g. after a shutdown), so that case is checked first.
+        """
+        if not self.future.done():
+            return None
+        if self.future.cancelled():
+            return "cancelled"
+        exception = self.future.exception()
+        return str(exception) if exception is not None else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {"job_id": self.id, "status": self.status, "created_at": self.created_at}
+        if self.finished_at is not None:
+            data["finished_at"] = self.finished_at
+        if data["status"] == "succeeded":
+            data["result"] = self.future.result()
+        elif data["status"] == "failed":
+            data["error"] = self.error()
+        return data
+
+
+def _init_process_worker() -> None:
+    # A job worker that started its own extraction pool would block on
+    # joining it when it exits; the workers already run in parallel.
+    from extraction import disable_parallel_extraction
+
+    disable_parallel_extraction()
+
+
+## Creating the bounded worker pool
+class JobManager:
+    """Runs blocking work (crew kickoffs) off the event loop with admission control.
+
+    At most ``max_workers`` jobs run at once and at most ``max_queue`` more
+    wait for a worker; further submissions raise :class:`QueueFullError`
+    instead of piling up. Finished jobs are kept for ``job_ttl_seconds`` so
+    clients can poll for their results.
+
+    Args:
+        max_workers (int): Size of the worker pool.
+        max_queue (int): Number of jobs allowed to wait for a free worker.
+        executor (str): ``"thread"`` or ``"process"``.
+        job_ttl_seconds (float): How long finished jobs stay retrievable.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        max_queue: int,
+        executor: str = "thread",
+        job_ttl_seconds: float = 3600,
+    ):
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Unknown executor type '{executor}', expected 'thread' or 'process'")
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.executor_kind = executor
+        self.job_ttl_seconds = job_ttl_seconds
+        self._executor: Optional[Executor] = None
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> Executor:
+        # Created on first use so importing the module never spawns workers.
+        with self._lock:
+            if self._executor is None:
+                if self.executor_kind == "thread":
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+                else:
+                    # Created while other threads run (crew preload, RSS
+                    # sampler), so forking could copy a held lock into the
+                    # workers; start them from a forkserver as extraction.py does.
+                    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context(method),
+                        initializer=_init_process_worker,
+                    )
+            return self._executor
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Job:
+        """Queue ``fn(*args, **kwargs)`` on the pool.
+
+        Raises:
+            QueueFullError: If every worker is busy and the queue is full.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise QueueFullError(
+                f"Server is at capacity ({self.max_workers} running, {self.max_queue} queued)"
+            )
+        try:
+            future = self.executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+
+        job = Job(str(uuid.uuid4()), future)
+        with self._lock:
+            self._purge_expired()
+            self._jobs[job.id] = job
+        future.add_done_callback(lambda _: self._finish(job))
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        return {
+            "executor": self.executor_kind,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            **{status: statuses.count(status) for status in ("queued", "running", "succeeded", "failed")},
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _finish(self, job: Job) -> None:
+        job.finished_at = time.time()
+        self._slots.release()
+
+    def _purge_expired(self) -> None:
+        cutoff = time.time() - self.job_ttl_seconds
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+## Creating the shared worker pool and LLM concurrency limit
+job_manager = JobManager(
+    max_workers=int(os.getenv("ANALYZER_MAX_WORKERS", "4")),
+    max_queue=int(os.getenv("ANALYZER_MAX_QUEUE", "16")),
+    executor=os.getenv("ANALYZER_EXECUTOR", "thread"),
+    job_ttl_seconds=float(os.getenv("ANALYZER_JOB_TTL_SECONDS", "3600")),
+)
+
+# Tasks allowed to talk to the LLM at the same time, shared by single and
+# batch analyses so a large batch cannot exceed the provider's limits.
+# Per process: with the process executor each worker has its own.
+llm_slots = threading.BoundedSemaphore(int(os.getenv("ANALYZER_LLM_CONCURRENCY", "4")))
@@ -0,0 +1,281 @@
+## Importing libraries and files
+import copy
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from crewai import BaseLLM
+
+from document import registered_paths
+from metrics import LLM_GATEWAY_CALLS, LLM_MEMO_ENTRIES, LLM_RATE_WAIT_SECONDS
+
+# HTTP status codes worth retrying: rate limited, timed out, conflict, server errors.
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+# Exception class names used by litellm and the OpenAI SDK for the same conditions.
+RETRYABLE_ERRORS = {
+    "RateLimitError",
+    "APIConnectionError",
+    "APITimeoutError",
+    "Timeout",
+    "ServiceUnavailableError",
+    "InternalServerError",
+}
+# Model parameters that change the response and so belong in the memo key.
+MEMO_PARAMS = ("temperature", "top_p", "max_tokens", "seed", "stop")
+
+
+## Creating the shared rate limiter
+class TokenBucket:
+    """Thread-safe token bucket: ``rate_per_minute`` calls with bursts up to ``capacity``.
+
+    One bucket is shared by every agent of every request in the process, so
+    the provider sees a single, bounded request rate however many analyses
+    run at once.
+
+    Args:
+        rate_per_minute (float): Sustained calls per minute; 0 disables the limit.
+        capacity (float): Calls that may be made back to back after a quiet period.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: float):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take one token, sleeping until one is available. Returns the seconds waited."""
+        if self.rate <= 0:
+            return 0.0
+        started = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return now - started
+                wait = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every caller for ``seconds`` (e.g. after the provider answered 429)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+## Creating the response memo
+class ResponseMemo:
+    """Thread-safe LRU cache of LLM responses with a time-to-live.
+
+    Args:
+        max_entries (int): Responses kept; the least recently used is evicted first.
+        ttl_seconds (float): Lifetime of a response; 0 disables expiry.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored, response = entry
+            if self.ttl_seconds and time.monotonic() - stored > self.ttl_seconds:
+                del self._entries[key]
+                LLM_GATEWAY_CALLS.inc(outcome="memo_expired")
+                return None
+            self._entries.move_to_end(key)
+            return response
+
+    def put(self, key: str, response: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                LLM_GATEWAY_CALLS.inc(outcome="memo_evicted")
+            LLM_MEMO_ENTRIES.set(len(self._entries))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether a failed LLM call is worth retrying (rate limits, timeouts, server errors)."""
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    return type(error).__name__ in RETRYABLE_ERRORS or isinstance(error, (ConnectionError, TimeoutError))
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """The delay the provider asked for in a ``Retry-After`` header, if any."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with full jitter, so retrying callers spread out."""
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+def _canonical(messages: List[Dict[str, str]], params: Dict[str, Any], model: str) -> Tuple[str, Dict[str, str]]:
+    # Uploads get a fresh path every time, so the same document would never
+    # produce the same prompt. Registered document paths are replaced by the
+    # document's hash; the mapping is returned to restore them in a response.
+    text = json.dumps([model, messages, params], sort_keys=True, default=str)
+    placeholders = {}
+    for path, digest in sorted(registered_paths().items(), key=lambda item: -len(item[0])):
+        if digest and path in text:
+            placeholder = f"<document {digest}>"
+            text = text.replace(path, placeholder)
+            placeholders.setdefault(placeholder, path)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest(), placeholders
+
+
+def _replace_all(text: str, replacements: Dict[str, str]) -> str:
+    for old, new in replacements.items():
+        text = text.replace(old, new)
+    return text
+
+
+## Creating the gateway every agent talks to
+class LLMGateway(BaseLLM):
+    """Wraps the real LLM with the process-wide rate limit, retries and response memo.
+
+    Every call first looks for an identical earlier call (same model,
+    messages and parameters, with document paths normalised) in the memo.
+    Otherwise it takes a token from the shared bucket and calls the backend,
+    retrying rate limits, timeouts and server errors with jittered
+    exponential backoff. A 429 pauses the whole bucket, not just the caller.
+
+    Args:
+        backend (BaseLLM): The LLM that makes the calls (crewai's LLM or the stub).
+        limiter (TokenBucket): Shared rate limiter.
+        memo (ResponseMemo, optional): Shared response cache; None disables it.
+        max_retries (int): Retries after the first attempt.
+        backoff_seconds (float): Base of the exponential backoff.
+        backoff_max_seconds (float): Cap on a single backoff.
+    """
+
+    def __init__(
+        self,
+        backend: BaseLLM,
+        limiter: Optional["TokenBucket"] = None,
+        memo: Optional["ResponseMemo"] = None,
+        max_retries: int = 4,
+        backoff_seconds: float = 1.0,
+        backoff_max_seconds: float = 30.0,
+    ):
+        super().__init__(model=backend.model, temperature=backend.temperature)
+        self.backend = backend
+        self.limiter = limiter or rate_limiter
+        self.memo = memo
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+
+    def call(
+        self,
+        messages: Union[str, List[Dict[str, str]]],
+        tools: Optional[List[dict]] = None,
+        callbacks: Optional[List[Any]] = None,
+        available_functions: Optional[Dict[str, Any]] = None,
+    ) -> Union[str, Any]:
+        if isinstance(messages, str):
+            messages = [{"role": "user", "content": messages}]
+        # Agents set their stop words on the LLM they hold; the backend is
+        # shared, so each call gets its own shallow copy.
+        backend = copy.copy(self.backend)
+        backend.stop = self.stop
+
+        # Native function calls may run tools, so only plain completions are memoised.
+        key = placeholders = None
+        if self.memo is not None and not tools:
+            params = {name: getattr(backend, name, None) for name in MEMO_PARAMS}
+            key, placeholders = _canonical(messages, params, self.model)
+            cached = self.memo.get(key)
+            if cached is not None:
+                LLM_GATEWAY_CALLS.inc(outcome="memo_hit")
+                return _replace_all(cached, placeholders)
+
+        response = self._call_with_retries(backend, messages, tools, callbacks, available_functions)
+        # crewai rejects an empty reply and asks again; memoising it would
+        # replay the same empty reply to every retry until the TTL expires.
+        if key is not None and isinstance(response, str) and response.strip():
+            self.memo.put(key, _replace_all(response, {path: p for p, path in placeholders.items()}))
+        return response
+
+    def _call_with_retries(self, backend, messages, tools, callbacks, available_functions):
+        for attempt in range(self.max_retries + 1):
+            LLM_RATE_WAIT_SECONDS.observe(self.limiter.acquire())
+            try:
+                response = backend.call(messages, tools, callbacks, available_functions)
+            except Exception as error:
+                if attempt == self.max_retries or not is_retryable(error):
+                    LLM_GATEWAY_CALLS.inc(outcome="failed")
+                    raise
+                delay = retry_after(error)
+                if delay is None:
+                    delay = backoff_delay(attempt, self.backoff_seconds, self.backoff_max_seconds)
+                if getattr(error, "status_code", None) == 429 or type(error).__name__ == "RateLimitError":
+                    self.limiter.pause(delay)
+                LLM_GATEWAY_CALLS.inc(outcome="retried")
+                time.sleep(delay)
+                continue
+            LLM_GATEWAY_CALLS.inc(outcome="sent")
+            return response
+
+    def supports_function_calling(self) -> bool:
+        return self.backend.supports_function_calling()
+
+    def supports_stop_words(self) -> bool:
+        return self.backend.supports_stop_words()
+
+    def get_context_window_size(self) -> int:
+        return self.backend.get_context_window_size()
+
+
+def configure_http_pool() -> None:
+    """Send every litellm/OpenAI request over one pooled, keep-alive HTTP client."""
+    import httpx
+    import litellm
+
+    max_connections = int(os.getenv("ANALYZER_LLM_MAX_CONNECTIONS", "20"))
+    litellm.client_session = httpx.Client(
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+    )
+
+
+## Creating the limiter and memo shared by all agents and requests
+# Shared within one process. With ANALYZER_EXECUTOR=process (or several
+# uvicorn workers) every process has its own, so the limits add up.
+rate_limiter = TokenBucket(
+    rate_per_minute=float(os.getenv("ANALYZER_LLM_RPM", "60")),
+    capacity=float(os.getenv("ANALYZER_LLM_BURST", "10")),
+)
+response_memo = (
+    ResponseMemo(
+        max_entries=int(os.getenv("ANALYZER_LLM_MEMO_ENTRIES", "1024")),
+        ttl_seconds=float(os.getenv("ANALYZER_LLM_MEMO_TTL_SECONDS", "3600")),
+    )
+    if int(os.getenv("ANALYZER_LLM_MEMO_ENTRIES", "1024")) > 0
+    else None
+)
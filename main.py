@@ -1,44 +1,242 @@
 from fastapi import FastAPI, File, UploadFile, Form, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 import os
-import uuid
+import json
+import time
 import asyncio
-from crewai import Crew, Process
-from agents import financial_analyst, verifier, investment_advisor, risk_assessor
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import List
+from cache import document_cache, hash_file
+from document import open_document, close_document
+from extraction import shutdown_pool
+from jobs import QueueFullError, job_manager
+from metrics import CACHE_BYTES, CACHE_EVENTS, JOBS, PROCESS_RSS, RequestTrace, current_rss, registry
+from uploads import (
+    MAX_BATCH_REQUEST_BYTES,
+    MAX_UPLOAD_BYTES,
+    MULTIPART_OVERHEAD,
+    BatchBudget,
+    RequestSizeLimit,
+    UploadRejected,
+    new_upload_path,
+    save_batch_upload,
+    save_upload,
+)
 # BUG FIX 18: Imported "analyze_financial_document" from task.py, but main.py also defines
 # a function called analyze_financial_document — this causes a name collision that silently
 # overwrites the imported Task object with the FastAPI route function.
-# Fix: rename the import to avoid the clash.
-from task import (
-    analyze_financial_document as analyze_task,
-    investment_analysis,
-    risk_assessment,
-    verification,
+# Fix: the tasks are now imported (renamed) in pipeline.py, which owns the crew.
+from pipeline import EventCallback, crew_ready, crew_template, run_pipeline
+
+# Build the crew (crewai, LLM and agents) in the background as soon as the
+# server starts; when disabled the first analysis builds it instead.
+PRELOAD_CREW = os.getenv("ANALYZER_PRELOAD_CREW", "true").lower() in ("1", "true", "yes")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Off the event loop, so the server answers health checks while the crew
+    # loads. A failed preload is retried (and reported) by the first analysis.
+    if PRELOAD_CREW:
+        asyncio.get_running_loop().run_in_executor(None, crew_template)
+    yield
+    job_manager.shutdown()
+    shutdown_pool()
+
+
+app = FastAPI(title="Financial Document Analyzer", lifespan=lifespan)
+# Oversized uploads are refused from their Content-Length, before the
+# multipart body is received and spooled to disk.
+app.add_middleware(
+    RequestSizeLimit,
+    limits={
+        "/analyze": MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD,
+        "/analyze/stream": MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD,
+        "/analyze/batch": MAX_BATCH_REQUEST_BYTES,
+    },
 )
 
-app = FastAPI(title="Financial Document Analyzer")
 
+DEFAULT_QUERY = "Analyze this financial document for investment insights"
 
-def run_crew(query: str, file_path: str = "data/sample.pdf"):
-    """Run the full multi-agent crew on the uploaded financial document."""
+# Seconds of silence after which the event stream sends a keep-alive comment,
+# so proxies and gateways do not close it while a task is still running.
+SSE_HEARTBEAT_SECONDS = float(os.getenv("ANALYZER_SSE_HEARTBEAT_SECONDS", "15"))
+
+
+def run_crew(
+    query: str,
+    file_path: str = "data/sample.pdf",
+    sha256: str = None,
+    on_event: EventCallback = None,
+    trace: RequestTrace = None,
+) -> dict:
+    """Run the multi-agent pipeline on the uploaded financial document.
+
+    A local pre-check and the verifier's verdict gate the later tasks, so a
+    rejected document costs at most one LLM task. Per-task outputs are
+    cached by document hash and normalised query.
+
+    Returns:
+        dict: The pipeline result (see ``pipeline.run_pipeline``) plus the
+        parse/read/search counters of the document.
+    """
     # BUG FIX 19: Crew only included financial_analyst and analyze_financial_document.
-    # All four agents and all four tasks must be included so the full pipeline runs.
+    # run_pipeline (pipeline.py) now runs all four tasks with their own agents.
     # BUG FIX 20: file_path was accepted as a parameter but never passed to the tasks.
-    # Store it as an env var so FinancialDocumentTool can pick it up, OR pass via inputs.
-    financial_crew = Crew(
-        agents=[verifier, financial_analyst, investment_advisor, risk_assessor],
-        tasks=[verification, analyze_task, investment_analysis, risk_assessment],
-        process=Process.sequential,
-        verbose=True,
-    )
+    # run_pipeline passes it in every task's inputs.
 
-    result = financial_crew.kickoff(inputs={"query": query, "file_path": file_path})
-    return result
+    # Register the document so every tool call of this request shares one
+    # parse; run_pipeline parses it and builds the search index.
+    document = open_document(file_path, sha256=sha256 or hash_file(file_path), trace=trace)
+    try:
+        result = run_pipeline(query, file_path, document, on_event=on_event)
+    finally:
+        close_document(document)
+    return {**result, "document_stats": document.stats()}
 
 
 @app.get("/")
 async def root():
     """Health check endpoint"""
-    return {"message": "Financial Document Analyzer API is running"}
+    return {"message": "Financial Document Analyzer API is running", "crew_ready": crew_ready()}
+
+
+# Plain def: these walk the cache directories, so FastAPI runs them in its
+# thread pool instead of on the event loop.
+@app.get("/cache/stats")
+def cache_stats():
+    """Hit/miss counters and size of each document cache layer."""
+    return document_cache.stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Request, span, token, memory, job and cache metrics in the Prometheus text format."""
+    for status, count in job_manager.stats().items():
+        if isinstance(count, int) and status not in ("max_workers", "max_queue"):
+            JOBS.set(count, status=status)
+    for layer, counters in document_cache.stats().items():
+        for event in ("hits", "misses", "writes", "write_errors", "evictions"):
+            CACHE_EVENTS.set_total(counters.get(event, 0), layer=layer, event=event)
+        CACHE_BYTES.set(counters["bytes"], layer=layer)
+    PROCESS_RSS.set(current_rss())
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+def remove_file(file_path: str) -> None:
+    """Delete an uploaded file, ignoring errors."""
+    if os.path.exists(file_path):
+        try:
+            os.remove(file_path)
+        except Exception:
+            pass  # Ignore cleanup errors
+
+
+def analyze_file(
+    query: str,
+    file_path: str,
+    filename: str,
+    sha256: str = None,
+    on_event: EventCallback = None,
+    trace: RequestTrace = None,
+    include_trace: bool = False,
+) -> dict:
+    """Run the crew on a saved upload and build the API response.
+
+    Executed on the worker pool; the upload is deleted once the crew is done,
+    whether or not the client is still waiting for the result. The request's
+    spans, token counts and peak memory go to the metrics registry, and into
+    the response as ``trace`` when ``include_trace`` is set.
+    """
+    trace = trace or RequestTrace()
+    if trace.queued_at is not None:
+        trace.record("queue_wait", trace.queued_at, time.perf_counter())
+    status = "error"
+    try:
+        result = run_crew(query=query, file_path=file_path, sha256=sha256, on_event=on_event, trace=trace)
+        status = result.pop("status")
+        response = {
+            "status": status,
+            "query": query,
+            "analysis": result.pop("analysis"),
+            "file_processed": filename,
+            **result,
+        }
+    finally:
+        remove_file(file_path)
+        trace.finish(status)
+    if include_trace:
+        response["trace"] = trace.to_dict()
+    return response
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status, and once finished the result, of an analysis job."""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    return job.to_dict()
+
+
+async def submit_analysis(
+    file: UploadFile, query: str, on_event: EventCallback = None, include_trace: bool = False
+):
+    """Save an upload and queue its analysis on the worker pool.
+
+    The job owns the uploaded file once it is submitted; if submission fails
+    the file is removed here. The request's trace starts with the upload.
+
+    Raises:
+        HTTPException: 413/415 for rejected uploads, 429 when the pool is full.
+    """
+    file_path = new_upload_path()
+    submitted = False
+    trace = RequestTrace()
+
+    try:
+        # Ensure data directory exists
+        os.makedirs("data", exist_ok=True)
+
+        # Copy the upload to disk chunk by chunk, rejecting non-PDFs and
+        # oversized files and hashing them in the same pass
+        with trace.span("upload_write") as span:
+            saved = await save_upload(file, file_path)
+            span["bytes"] = saved.size
+
+        trace.queued_at = time.perf_counter()
+        job = job_manager.submit(
+            analyze_file,
+            query,
+            file_path,
+            file.filename,
+            saved.sha256,
+            on_event=on_event,
+            trace=trace,
+            include_trace=include_trace,
+        )
+        submitted = True
+        return job
+
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error processing financial document: {str(e)}"
+        )
+
+    finally:
+        # Clean up uploaded file if it never reached a worker
+        if not submitted:
+            remove_file(file_path)
+            trace.finish("rejected")
 
 
 # BUG FIX 21: The FastAPI route function was named "analyze_financial_document" —
@@ -48,51 +246,215 @@ async def root():
 @app.post("/analyze")
 async def analyze_document_endpoint(
     file: UploadFile = File(...),
-    query: str = Form(default="Analyze this financial document for investment insights")
+    query: str = Form(default=DEFAULT_QUERY),
+    async_job: bool = Form(default=False),
+    include_trace: bool = Form(default=False),
 ):
-    """Analyze a financial document and provide comprehensive investment recommendations."""
-
-    file_id = str(uuid.uuid4())
-    file_path = f"data/financial_document_{file_id}.pdf"
+    """Analyze a financial document and provide comprehensive investment recommendations.
 
-    try:
-        # Ensure data directory exists
-        os.makedirs("data", exist_ok=True)
+    The crew runs on a bounded worker pool so the event loop stays free. With
+    ``async_job=true`` the endpoint returns a job id straight away; poll
+    ``GET /jobs/{job_id}`` for the result. ``include_trace=true`` adds the
+    per-request span, token and memory breakdown to the response.
+    """
 
-        # Save uploaded file
-        with open(file_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
+    # BUG FIX 22: Condition "query=="" or query is None" checks in the wrong order.
+    # "query is None" should come first, otherwise calling .strip() on None elsewhere
+    # would raise AttributeError. Also added .strip() check for whitespace-only input.
+    if not query or not query.strip():
+        query = DEFAULT_QUERY
 
-        # BUG FIX 22: Condition "query=="" or query is None" checks in the wrong order.
-        # "query is None" should come first, otherwise calling .strip() on None elsewhere
-        # would raise AttributeError. Also added .strip() check for whitespace-only input.
-        if not query or not query.strip():
-            query = "Analyze this financial document for investment insights"
+    # Process the financial document with all analysts on the worker pool
+    job = await submit_analysis(file, query.strip(), include_trace=include_trace)
 
-        # Process the financial document with all analysts
-        response = run_crew(query=query.strip(), file_path=file_path)
-
-        return {
-            "status": "success",
-            "query": query,
-            "analysis": str(response),
-            "file_processed": file.filename,
-        }
+    if async_job:
+        return JSONResponse(
+            status_code=202,
+            content={"status": "queued", "job_id": job.id, "query": query},
+        )
 
+    try:
+        return await asyncio.wrap_future(job.future)
+    except asyncio.CancelledError:
+        if not job.future.cancelled():
+            raise  # the client went away
+        raise HTTPException(status_code=503, detail="Analysis was cancelled because the server is shutting down.")
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error processing financial document: {str(e)}"
         )
 
-    finally:
-        # Clean up uploaded file
-        if os.path.exists(file_path):
+
+def sse_event(event: str, data) -> str:
+    """Format one Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/analyze/stream")
+async def analyze_stream_endpoint(
+    file: UploadFile = File(...),
+    query: str = Form(default=DEFAULT_QUERY),
+    include_trace: bool = Form(default=False),
+):
+    """Analyze a financial document, streaming progress as Server-Sent Events.
+
+    Sends ``queued`` once the upload is accepted, then ``precheck``,
+    ``stage_started`` and ``stage_finished`` (with the stage's output) as the
+    pipeline runs, and finally ``result`` (the ``POST /analyze`` body) or
+    ``error``. The analysis keeps running if the client disconnects, so its
+    outputs still reach the document cache.
+    """
+    if not query or not query.strip():
+        query = DEFAULT_QUERY
+    query = query.strip()
+
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+
+    def publish(event: str, data) -> None:
+        # Called from the worker threads; hand the event to the event loop.
+        loop.call_soon_threadsafe(events.put_nowait, (event, data))
+
+    # Callbacks cannot cross into a process pool; there only queued/result are sent.
+    job = await submit_analysis(
+        file,
+        query,
+        on_event=publish if job_manager.executor_kind == "thread" else None,
+        include_trace=include_trace,
+    )
+    job.future.add_done_callback(lambda _: publish("done", None))
+
+    async def stream():
+        yield sse_event("queued", {"job_id": job.id, "query": query})
+        while True:
             try:
-                os.remove(file_path)
-            except Exception:
-                pass  # Ignore cleanup errors
+                event, data = await asyncio.wait_for(events.get(), timeout=SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if event != "done":
+                yield sse_event(event, data)
+                continue
+            if job.error() is not None:
+                yield sse_event("error", {
+                    "detail": f"Error processing financial document: {job.error()}",
+                })
+            else:
+                yield sse_event("result", job.future.result())
+            return
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _run_batch(documents, duplicates, query: str):
+    """Schedule unique documents on the shared pool and yield results as they finish.
+
+    At most ``job_manager.max_workers`` of the batch's documents are in flight
+    at once, leaving the pool's queue to single ``/analyze`` requests; when
+    the pool is full the batch waits instead of failing.
+    """
+    pending = deque(documents)
+    in_flight = {}
+    try:
+        while pending or in_flight:
+            while pending and len(in_flight) < job_manager.max_workers:
+                filename, saved = pending[0]
+                try:
+                    job = job_manager.submit(analyze_file, query, saved.path, filename, saved.sha256)
+                except QueueFullError:
+                    break
+                pending.popleft()
+                in_flight[asyncio.wrap_future(job.future)] = (filename, saved)
+
+            if not in_flight:
+                await asyncio.sleep(1)  # the pool is busy with other requests
+                continue
+
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                filename, saved = in_flight.pop(future)
+                # exception() raises on a cancelled future (e.g. during shutdown).
+                error = "cancelled" if future.cancelled() else future.exception()
+                if error is not None:
+                    result = {
+                        "status": "error",
+                        "detail": f"Error processing financial document: {error}",
+                    }
+                else:
+                    result = future.result()
+                line = {"event": "result", "file": filename, "sha256": saved.sha256, **result}
+                yield line
+                for duplicate in duplicates.get(saved.sha256, []):
+                    yield {**line, "file": duplicate, "file_processed": duplicate, "duplicate_of": filename}
+    finally:
+        # Client went away: drop files that never reached a worker.
+        for _, saved in pending:
+            remove_file(saved.path)
+
+
+@app.post("/analyze/batch")
+async def analyze_batch_endpoint(
+    files: List[UploadFile] = File(...),
+    query: str = Form(default=DEFAULT_QUERY),
+):
+    """Analyze many financial documents (PDFs and/or ZIP archives of PDFs) in one request.
+
+    Identical documents are detected by content hash and analysed once.
+    Results are streamed back as NDJSON, one line per document in the order
+    they finish, followed by a summary line.
+    """
+    if not query or not query.strip():
+        query = DEFAULT_QUERY
+    query = query.strip()
+    os.makedirs("data", exist_ok=True)
+
+    # One allowance of documents and decompressed bytes for the whole
+    # request; archives stop being unpacked as soon as it is used up.
+    budget = BatchBudget()
+    saved, rejected = [], []
+    try:
+        for upload in files:
+            part_saved, part_rejected = await save_batch_upload(upload, budget)
+            saved.extend(part_saved)
+            rejected.extend(part_rejected)
+    except BaseException:
+        for _, upload in saved:
+            remove_file(upload.path)
+        raise
+
+    # Deduplicate by content hash: each distinct document runs once and its
+    # result is repeated for every copy.
+    unique, duplicates, seen = [], {}, set()
+    for filename, upload in saved:
+        if upload.sha256 in seen:
+            duplicates.setdefault(upload.sha256, []).append(filename)
+            remove_file(upload.path)
+        else:
+            seen.add(upload.sha256)
+            unique.append((filename, upload))
+
+    async def stream():
+        failed = len(rejected)
+        for filename, detail in rejected:
+            yield json.dumps({"event": "result", "file": filename, "status": "rejected", "detail": detail}) + "\n"
+        async for line in _run_batch(unique, duplicates, query):
+            failed += line["status"] != "success"
+            yield json.dumps(line) + "\n"
+        yield json.dumps({
+            "event": "summary",
+            "query": query,
+            "documents": len(saved) + len(rejected),
+            "unique": len(unique),
+            "duplicates": len(saved) - len(unique),
+            "failed": failed,
+        }) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
 
 
 if __name__ == "__main__":
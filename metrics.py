@@ -0,0 +1,286 @@
+## Importing libraries and files
+import os
+import threading
+import time
+import weakref
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Histogram buckets in seconds, from a tool call up to a slow crew.
+DEFAULT_BUCKETS = (0.005, 0.025, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+RSS_SAMPLE_SECONDS = float(os.getenv("ANALYZER_RSS_SAMPLE_SECONDS", "0.1"))
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+## Creating the Prometheus-style metric types
+class Counter:
+    """A monotonically increasing value per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._values: Dict[LabelKey, float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        with self._lock:
+            self._values[_label_key(labels)] += amount
+
+    def set_total(self, value: float, **labels: Any) -> None:
+        """Mirror a running total kept elsewhere (e.g. the cache's own counters)."""
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_format_labels(key)} {value:g}" for key, value in self._values.items()]
+
+
+class Gauge(Counter):
+    """A value per label set that can go up and down."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:
+        self.set_total(value, **labels)
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count of observations per label set."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelKey, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            # One count per bucket, then +Inf, sum and count.
+            series = self._series.setdefault(key, [0.0] * (len(self.buckets) + 3))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-3] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, series in self._series.items():
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f"{self.name}_bucket{_format_labels(key, (('le', f'{bound:g}'),))} {count:g}")
+                lines.append(f"{self.name}_bucket{_format_labels(key, (('le', '+Inf'),))} {series[-3]:g}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {series[-2]:g}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {series[-1]:g}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds the process's metrics and renders them in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str) -> Counter:
+        return self._register(Counter(name, documentation))
+
+    def gauge(self, name: str, documentation: str) -> Gauge:
+        return self._register(Gauge(name, documentation))
+
+    def histogram(self, name: str, documentation: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+## Creating the shared registry and the analyzer's metrics
+registry = MetricsRegistry()
+REQUESTS = registry.counter("analyzer_requests_total", "Analyses finished, by outcome.")
+REQUEST_SECONDS = registry.histogram("analyzer_request_duration_seconds", "Wall-clock time of an analysis.")
+SPAN_SECONDS = registry.histogram("analyzer_span_duration_seconds", "Time spent per pipeline span.")
+LLM_TOKENS = registry.counter("analyzer_llm_tokens_total", "LLM tokens used, by agent and type.")
+LLM_REQUESTS = registry.counter("analyzer_llm_requests_total", "Successful LLM requests, by agent.")
+REQUEST_PEAK_RSS = registry.gauge(
+    "analyzer_request_peak_rss_bytes", "Peak process RSS observed during the latest analysis."
+)
+PROCESS_RSS = registry.gauge("process_resident_memory_bytes", "Current resident set size of the process.")
+JOBS = registry.gauge("analyzer_jobs", "Jobs held by the worker pool, by status.")
+CACHE_EVENTS = registry.counter("analyzer_cache_events_total", "Document cache hits, misses, writes, failed writes and evictions, by layer.")
+CACHE_BYTES = registry.gauge("analyzer_cache_bytes", "Size of each document cache layer on disk.")
+LLM_GATEWAY_CALLS = registry.counter(
+    "analyzer_llm_gateway_calls_total",
+    "LLM gateway calls and memo events, by outcome (sent, memo_hit, retried, failed, memo_evicted, memo_expired).",
+)
+LLM_RATE_WAIT_SECONDS = registry.histogram(
+    "analyzer_llm_rate_limit_wait_seconds",
+    "Time LLM calls waited for the shared rate limiter.",
+    buckets=(0, 0.01, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+LLM_MEMO_ENTRIES = registry.gauge("analyzer_llm_memo_entries", "LLM responses held in the gateway's memo.")
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes (0 if it cannot be read)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is None:
+        return 0
+    # Not Linux: fall back to the lifetime peak (KiB on Linux, bytes on macOS).
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+## Creating the memory sampler shared by all in-flight requests
+_active_traces: "weakref.WeakSet[RequestTrace]" = weakref.WeakSet()
+_sampler: Optional[threading.Thread] = None
+_sampler_lock = threading.Lock()
+
+
+def _sample_rss() -> None:
+    while True:
+        rss = current_rss()
+        for trace in list(_active_traces):
+            trace.observe_rss(rss)
+        time.sleep(RSS_SAMPLE_SECONDS)
+
+
+def _ensure_sampler() -> None:
+    global _sampler
+    with _sampler_lock:
+        if _sampler is None:
+            _sampler = threading.Thread(target=_sample_rss, name="rss-sampler", daemon=True)
+            _sampler.start()
+
+
+## Creating the per-request trace
+class RequestTrace:
+    """Spans, LLM token counts and peak memory of one analysis request.
+
+    Spans are recorded from any thread (upload, extraction, each task and
+    each tool call). While the trace is active a shared background thread
+    samples the process RSS every ``ANALYZER_RSS_SAMPLE_SECONDS``; since
+    requests share the process, the peak covers everything that ran
+    alongside this one.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queued_at: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.spans: List[Dict[str, Any]] = []
+        self.tokens: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"prompt": 0, "completion": 0, "requests": 0}
+        )
+        self.peak_rss = current_rss()
+        self._lock = threading.Lock()
+        _active_traces.add(self)
+        _ensure_sampler()
+
+    def __getstate__(self):
+        # Traces travel to process-pool workers with the job arguments.
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["tokens"] = dict(self.tokens)
+        return state
+
+    def __setstate__(self, state):
+        tokens = state.pop("tokens")
+        self.__dict__.update(state)
+        self.tokens = defaultdict(lambda: {"prompt": 0, "completion": 0, "requests": 0}, tokens)
+        self._lock = threading.Lock()
+        if self.finished is None:
+            _active_traces.add(self)
+            _ensure_sampler()
+
+    def record(self, name: str, start: float, end: float, **attrs: Any) -> None:
+        """Record a span from two ``time.perf_counter()`` readings."""
+        span = {"name": name, "start": round(start - self.started, 4), "seconds": round(end - start, 4), **attrs}
+        with self._lock:
+            self.spans.append(span)
+        SPAN_SECONDS.observe(end - start, span=name)
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[Dict[str, Any]]:
+        """Time the enclosed block. The yielded dict can add attributes to the span."""
+        start = time.perf_counter()
+        try:
+            yield attrs
+        finally:
+            self.record(name, start, time.perf_counter(), **attrs)
+
+    def add_tokens(self, agent: str, prompt: int, completion: int, requests: int = 0) -> None:
+        with self._lock:
+            usage = self.tokens[agent]
+            usage["prompt"] += prompt
+            usage["completion"] += completion
+            usage["requests"] += requests
+        LLM_TOKENS.inc(prompt, agent=agent, type="prompt")
+        LLM_TOKENS.inc(completion, agent=agent, type="completion")
+        LLM_REQUESTS.inc(requests, agent=agent)
+
+    def observe_rss(self, rss: int) -> None:
+        if rss > self.peak_rss:
+            self.peak_rss = rss
+
+    def finish(self, status: str) -> None:
+        """Stop sampling and record the request in the shared metrics."""
+        self.observe_rss(current_rss())
+        self.finished = time.perf_counter()
+        _active_traces.discard(self)
+        REQUESTS.inc(status=status)
+        REQUEST_SECONDS.observe(self.finished - self.started)
+        REQUEST_PEAK_RSS.set(self.peak_rss)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The timing breakdown returned in the API response."""
+        end = self.finished if self.finished is not None else time.perf_counter()
+        with self._lock:
+            return {
+                "total_seconds": round(end - self.started, 4),
+                "spans": sorted(self.spans, key=lambda span: span["start"]),
+                "tokens": {agent: dict(usage) for agent, usage in self.tokens.items()},
+                "peak_rss_bytes": self.peak_rss,
+            }
@@ -0,0 +1,256 @@
+## Importing libraries and files
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+from cache import document_cache
+from document import ParsedDocument
+from jobs import llm_slots
+from metrics import RequestTrace
+from precheck import PrecheckResult, check_file, check_text
+
+# crewai, the LLM and the agents take seconds to import and build, so they are
+# loaded on first use (see crew_template()) rather than when the app starts.
+if TYPE_CHECKING:
+    from crewai import Crew, Task
+
+# Stage names, in dependency order. They double as the results-cache task names.
+STAGES = ("verification", "analysis", "investment", "risk")
+
+# Receives progress events as ``(event, data)``; see run_pipeline().
+EventCallback = Callable[[str, Dict[str, Any]], None]
+
+_VERDICT = re.compile(r"verdict\W{0,20}(pass|fail)\b", re.IGNORECASE)
+_BARE_VERDICT = re.compile(r"\b(PASS|FAIL)\b")
+
+
+def parse_verdict(text: str) -> Optional[str]:
+    """Extract the verifier's PASS/FAIL verdict from its report.
+
+    Prefers an explicit ``Verdict: PASS``-style line and falls back to the
+    last upper-case PASS or FAIL in the text.
+
+    Returns:
+        str: ``"PASS"``, ``"FAIL"`` or None if the report states neither.
+    """
+    verdicts = _VERDICT.findall(text) or _BARE_VERDICT.findall(text)
+    return verdicts[-1].upper() if verdicts else None
+
+
+def precheck_document(document: ParsedDocument) -> PrecheckResult:
+    """Local checks run before any LLM call: file structure, text density and content."""
+    structure = check_file(document.path)
+    if not structure.passed:
+        return structure
+    if not document.has_text:
+        return PrecheckResult(False, [document.load()], structure.metrics)
+    return check_text(document.load(), int(structure.metrics["pages"]))
+
+
+## Creating the shared crew on first use
+_crew: Optional["Crew"] = None
+_crew_lock = threading.Lock()
+
+
+def crew_template() -> "Crew":
+    """The four agents and tasks, imported and built once per process.
+
+    Nothing here runs at import time: the first analysis (or the server's
+    startup preload, see main.py) pays for importing crewai and constructing
+    the LLM and agents, and every later request copies the result.
+    """
+    global _crew
+    with _crew_lock:
+        if _crew is None:
+            from crewai import Crew, Process
+
+            from agents import financial_analyst, verifier, investment_advisor, risk_assessor
+            from task import (
+                analyze_financial_document as analyze_task,
+                investment_analysis,
+                risk_assessment,
+                verification,
+            )
+
+            _crew = Crew(
+                agents=[verifier, financial_analyst, investment_advisor, risk_assessor],
+                tasks=[verification, analyze_task, investment_analysis, risk_assessment],
+                process=Process.sequential,
+                verbose=True,
+            )
+        return _crew
+
+
+def crew_ready() -> bool:
+    """Whether the crew has been built in this process."""
+    return _crew is not None
+
+
+def build_tasks() -> Dict[str, "Task"]:
+    """Fresh copies of the four tasks for one request, keyed by stage name.
+
+    ``kickoff()`` interpolates the inputs into the agents and tasks in place,
+    so every request works on its own copies; the ``context`` links between
+    tasks are remapped onto the copies.
+    """
+    return dict(zip(STAGES, crew_template().copy().tasks))
+
+
+def run_stage(task: "Task", inputs: Dict[str, str], trace: Optional[RequestTrace] = None) -> str:
+    """Run a single task as a one-task crew and return its raw output.
+
+    The crew's token usage is added to ``trace`` under the task's agent.
+    """
+    from crewai import Crew, Process
+
+    crew = Crew(agents=[task.agent], tasks=[task], process=Process.sequential, verbose=True)
+    with llm_slots:
+        result = crew.kickoff(inputs=inputs)
+    if trace is not None and result.token_usage is not None:
+        usage = result.token_usage
+        trace.add_tokens(
+            task.agent.role, usage.prompt_tokens, usage.completion_tokens, usage.successful_requests
+        )
+    return result.tasks_output[0].raw
+
+
+def _cached_stage(task: "Task", output: str) -> None:
+    from crewai.tasks.task_output import TaskOutput
+
+    # Later stages read their context from task.output, so a stage served
+    # from the cache still has to look as if it ran.
+    task.output = TaskOutput(description=task.description, raw=output, agent=task.agent.role)
+
+
+def _rejected(stages: Dict[str, str], detail: str, analysis: str, **extra: Any) -> Dict[str, Any]:
+    return {"status": "rejected", "detail": detail, "analysis": analysis, "stages": stages, **extra}
+
+
+def stage_graph(tasks: Dict[str, "Task"]) -> Dict[str, List[str]]:
+    """Prerequisite stages of each stage, read from the tasks' ``context``."""
+    names = {id(task): name for name, task in tasks.items()}
+    return {
+        name: [names[id(dep)] for dep in task.context if id(dep) in names]
+        if isinstance(task.context, list)
+        else []
+        for name, task in tasks.items()
+    }
+
+
+## Creating the early-exit pipeline
+def run_pipeline(
+    query: str,
+    file_path: str,
+    document: ParsedDocument,
+    on_event: Optional[EventCallback] = None,
+) -> Dict[str, Any]:
+    """Analyse a document stage by stage, stopping as soon as it is rejected.
+
+    The local pre-check runs first and rejects unreadable, password-protected, scanned
+    or non-financial PDFs without calling the LLM. The stages then run as a
+    dependency graph: each starts as soon as the stages in its ``context``
+    have finished, so independent stages (investment and risk) run
+    concurrently and the wall-clock time follows the critical path. A FAIL
+    verdict from verification skips everything after it. Each stage's output
+    is cached by document hash and query, and a cached stage is not re-run.
+
+    Args:
+        query (str): The user's question.
+        file_path (str): Path handed to the tasks (and resolved by the tools).
+        document (ParsedDocument): The registered document for ``file_path``.
+        on_event (callable, optional): Called from the pipeline's thread with
+            ``("precheck", {...})``, then ``("stage_started", {"stage"})`` and
+            ``("stage_finished", {"stage", "status", "seconds", "output"})`` for
+            each stage as it happens; verification's event also has ``verdict``.
+
+    Returns:
+        dict: ``status`` (``success`` or ``rejected``), ``analysis`` (the last
+        stage's output), ``outputs`` (every stage's output), ``verdict``, ``precheck`` details, ``stages``
+        (``ran``, ``cached``, ``skipped``, or ``passed``/``failed`` for the
+        pre-check) and ``timings`` (seconds per stage and in total).
+    """
+    emit = on_event or (lambda event, data: None)
+    started = time.perf_counter()
+    stages = {"precheck": "failed", **{name: "skipped" for name in STAGES}}
+    timings: Dict[str, float] = {}
+    with document.span("precheck"):
+        check = precheck_document(document)
+    timings["precheck"] = round(time.perf_counter() - started, 3)
+    precheck = {"reasons": check.reasons, **check.metrics}
+    emit("precheck", {"status": "passed" if check.passed else "failed", **precheck})
+    if not check.passed:
+        detail = "Document failed the pre-check: " + "; ".join(check.reasons)
+        timings["total"] = timings["precheck"]
+        return _rejected(stages, detail, detail, verdict=None, precheck=precheck, timings=timings)
+    stages["precheck"] = "passed"
+
+    document.build_index()
+    tasks = build_tasks()
+    graph = stage_graph(tasks)
+    inputs = {"query": query, "file_path": file_path}
+    outputs: Dict[str, str] = {}
+    verdict = None
+
+    pending = list(STAGES)
+    with ThreadPoolExecutor(max_workers=len(STAGES), thread_name_prefix="stage") as pool:
+        running: Dict[Future, str] = {}
+        while pending or running:
+            for name in [n for n in pending if all(dep in outputs for dep in graph[n])]:
+                pending.remove(name)
+                running[pool.submit(_run_or_reuse, name, tasks[name], inputs, document, query)] = name
+                emit("stage_started", {"stage": name})
+            if not running:
+                break  # the remaining stages depend on a stage that was skipped
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                outputs[name], stages[name], timings[name] = future.result()
+                event = {"stage": name, "status": stages[name], "seconds": timings[name], "output": outputs[name]}
+                if name == "verification":
+                    verdict = parse_verdict(outputs[name])
+                    event["verdict"] = verdict
+                    if verdict == "FAIL":
+                        pending.clear()
+                emit("stage_finished", event)
+
+    # Report in stage order rather than completion order.
+    outputs = {name: outputs[name] for name in STAGES if name in outputs}
+    timings = {name: timings[name] for name in ("precheck", *STAGES) if name in timings}
+    timings["total"] = round(time.perf_counter() - started, 3)
+    if verdict == "FAIL":
+        return _rejected(
+            stages,
+            "Document failed verification",
+            outputs["verification"],
+            verdict=verdict,
+            precheck=precheck,
+            timings=timings,
+        )
+    return {
+        "status": "success",
+        "analysis": outputs[STAGES[-1]],
+        "outputs": outputs,
+        "verdict": verdict,
+        "precheck": precheck,
+        "stages": stages,
+        "timings": timings,
+    }
+
+
+def _run_or_reuse(
+    name: str, task: "Task", inputs: Dict[str, str], document: ParsedDocument, query: str
+) -> Tuple[str, str, float]:
+    started = time.perf_counter()
+    with document.span(f"task:{name}") as span:
+        output = document_cache.get_result(document.sha256, query, name)
+        if output is not None:
+            _cached_stage(task, output)
+            span["status"] = "cached"
+        else:
+            output = run_stage(task, inputs, document.trace)
+            document_cache.put_result(document.sha256, query, name, output)
+            span["status"] = "ran"
+    return output, span["status"], round(time.perf_counter() - started, 3)
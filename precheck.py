@@ -0,0 +1,82 @@
+## Importing libraries and files
+import os
+import re
+from typing import Dict, List, NamedTuple
+
+from pypdf import PasswordType, PdfReader
+
+# Below this many extracted characters per page the PDF is most likely a scan.
+MIN_CHARS_PER_PAGE = int(os.getenv("ANALYZER_MIN_CHARS_PER_PAGE", "200"))
+# Financial keyword hits per 1,000 words a document needs to be worth analysing.
+MIN_FINANCIAL_SCORE = float(os.getenv("ANALYZER_MIN_FINANCIAL_SCORE", "5"))
+
+PDF_MAGIC = b"%PDF-"
+HEADER_WINDOW = 1024
+
+_FINANCIAL_TERMS = re.compile(
+    r"\b(revenues?|net (income|loss|sales)|earnings|eps|per share|gross (profit|margin)|"
+    r"operating (income|expenses|activities)|ebitda|assets|liabilities|equity|"
+    r"cash (flows?|equivalents)|balance sheets?|income statements?|fiscal|quarter(ly)?|"
+    r"dividends?|debt|borrowings|capital expenditures?|depreciation|amortization|"
+    r"auditor|audited|gaap|ifrs|10-k|10-q|annual report|shareholders?|stockholders?)\b",
+    re.IGNORECASE,
+)
+_WORD = re.compile(r"\S+")
+
+
+class PrecheckResult(NamedTuple):
+    passed: bool
+    reasons: List[str]
+    metrics: Dict[str, float]
+
+
+def check_file(path: str) -> PrecheckResult:
+    """Cheap structural checks run before the PDF is parsed.
+
+    Confirms the file starts with a PDF header, can be opened without a
+    password and has at least one page. PDFs encrypted with only an owner
+    password (which restricts printing or editing) open with the empty user
+    password and are accepted.
+    """
+    with open(path, "rb") as f:
+        header = f.read(HEADER_WINDOW)
+    if PDF_MAGIC not in header:
+        return PrecheckResult(False, ["file is not a PDF (missing %PDF- header)"], {})
+
+    try:
+        reader = PdfReader(path)
+        if reader.is_encrypted and reader.decrypt("") == PasswordType.NOT_DECRYPTED:
+            return PrecheckResult(False, ["PDF is password-protected"], {})
+        pages = len(reader.pages)
+    except Exception as e:
+        return PrecheckResult(False, [f"PDF is corrupted or unreadable: {e}"], {})
+
+    if pages == 0:
+        return PrecheckResult(False, ["PDF has no pages"], {"pages": 0})
+    return PrecheckResult(True, [], {"pages": pages})
+
+
+def financial_score(text: str) -> float:
+    """Financial keyword hits per 1,000 words of text."""
+    words = sum(1 for _ in _WORD.finditer(text))
+    if not words:
+        return 0.0
+    return 1000 * sum(1 for _ in _FINANCIAL_TERMS.finditer(text)) / words
+
+
+def check_text(text: str, pages: int) -> PrecheckResult:
+    """Checks on the extracted text: enough of it, and financial in nature."""
+    chars_per_page = len(text) / max(pages, 1)
+    score = financial_score(text)
+    metrics = {"pages": pages, "chars_per_page": round(chars_per_page, 1), "financial_score": round(score, 2)}
+
+    reasons = []
+    if chars_per_page < MIN_CHARS_PER_PAGE:
+        reasons.append(
+            f"too little extractable text ({chars_per_page:.0f} chars/page); the PDF may be a scanned image"
+        )
+    elif score < MIN_FINANCIAL_SCORE:
+        reasons.append(
+            f"few financial terms ({score:.1f} per 1,000 words); this does not look like a financial document"
+        )
+    return PrecheckResult(not reasons, reasons, metrics)
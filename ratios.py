@@ -0,0 +1,258 @@
+## Importing libraries and files
+import re
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Line items pulled from statement tables, with the row labels they appear
+# under. Only the first matching row of each item is used: statements list
+# the headline figure before any breakdown or footnote repeating the label.
+LINE_ITEMS = {
+    "revenue": r"total (net )?revenues?|net revenues?|total net sales|net sales|revenues?",
+    "gross_profit": r"(total )?gross (profit|margin)",
+    "operating_income": r"(total )?(income|loss|income \(loss\)) from operations|operating (income|profit)",
+    "net_income": r"net (income|earnings|profit)( \(loss\))?( attributable to [a-z ]+)?|net loss",
+    "eps": r"(diluted )?(eps|earnings per (common )?share)( - diluted| diluted)?",
+    "share_price": r"(closing )?(share|stock) price",
+    "cash": r"cash and cash equivalents",
+    "current_assets": r"total current assets",
+    "total_assets": r"total assets",
+    "current_liabilities": r"total current liabilities",
+    "total_liabilities": r"total liabilities",
+    "total_debt": r"total debt|total borrowings|long-term debt",
+    "equity": r"total (stockholders'?|shareholders'?) equity|total equity",
+    "operating_cash_flow": r"net cash (provided by|from|used in) operating activities",
+    "capex": r"capital expenditures|purchases of property(,)? (plant )?and equipment",
+}
+ITEMS = tuple(LINE_ITEMS)
+_ITEM_INDEX = {name: i for i, name in enumerate(ITEMS)}
+
+_NUMBER = r"\(?-?\$?\d[\d,]*(?:\.\d+)?\)?%?"
+_NUMBER_TOKEN = re.compile(_NUMBER)
+# A row names a line item only if its label is the item's label and nothing
+# more, apart from punctuation or a footnote marker: "Total liabilities and
+# stockholders' equity" is not total liabilities, "Net income per share" is
+# not net income.
+_ITEM_LABELS = [
+    re.compile(rf"(?:{pattern})[\s:.,*]*(?:\(\w\))?", re.IGNORECASE) for pattern in LINE_ITEMS.values()
+]
+# Footnote references printed after a label, e.g. "(Note 3)" or "(Notes 4 and 5)".
+# Left in place, their number would be read as the first figure of the row.
+_FOOTNOTE = re.compile(r"\(notes?\s+\d+[a-z]?(?:\s*(?:,|and|&)\s*\d+[a-z]?)*\)", re.IGNORECASE)
+_YEAR = re.compile(r"^(?:19|20)\d{2}$")
+# A column header: two or more fiscal years or quarters and nothing else.
+_PERIOD_TOKEN = re.compile(r"(?:Q[1-4]\s*)?(?:FY\s*)?(?:19|20)\d{2}", re.IGNORECASE)
+_HEADER_LINE = re.compile(rf"^\s*(?:{_PERIOD_TOKEN.pattern}\s*){{2,}}$", re.IGNORECASE)
+
+# Ratios as (numerator, denominator) line items.
+RATIOS = {
+    "gross_margin": ("gross_profit", "revenue"),
+    "operating_margin": ("operating_income", "revenue"),
+    "net_margin": ("net_income", "revenue"),
+    "roe": ("net_income", "equity"),
+    "roa": ("net_income", "total_assets"),
+    "debt_to_equity": ("total_debt", "equity"),
+    "liabilities_to_equity": ("total_liabilities", "equity"),
+    "current_ratio": ("current_assets", "current_liabilities"),
+    "pe_ratio": ("share_price", "eps"),
+}
+PERCENT_RATIOS = {"gross_margin", "operating_margin", "net_margin", "roe", "roa"}
+_NUMERATORS = np.array([_ITEM_INDEX[num] for num, _ in RATIOS.values()])
+_DENOMINATORS = np.array([_ITEM_INDEX[den] for _, den in RATIOS.values()])
+
+
+def strip_footnotes(line: str) -> str:
+    """Blank out footnote references, keeping every other character in place."""
+    return _FOOTNOTE.sub(lambda m: " " * len(m.group()), line)
+
+
+def classify_label(label: str) -> int:
+    """Index of the line item ``label`` names in ``ITEMS``, or -1."""
+    for i, pattern in enumerate(_ITEM_LABELS):
+        if pattern.fullmatch(label):
+            return i
+    return -1
+
+
+def _split_row(line: str) -> Optional[Tuple[str, List[str]]]:
+    """Split a statement line into its label and the run of figures ending it.
+
+    Tokens are read from the end of the line, so the cost stays linear in
+    its length. A "$" printed apart from its figure is skipped.
+    """
+    tokens = strip_footnotes(line).split()
+    end = len(tokens)
+    figures = []
+    while end and (tokens[end - 1] == "$" or _NUMBER_TOKEN.fullmatch(tokens[end - 1])):
+        end -= 1
+        if tokens[end] != "$":
+            figures.append(tokens[end])
+    if not figures or not end:
+        return None
+    return " ".join(tokens[:end]), figures[::-1]
+
+
+def parse_number(token: str) -> float:
+    """Parse a statement figure: ``(1,234)`` and ``-1,234`` are negative."""
+    negative = token.startswith("(") or token.lstrip("($").startswith("-")
+    value = float(token.strip("()$%-").replace("$", "").replace(",", ""))
+    return -value if negative else value
+
+
+## Creating the columnar line-item table
+class FinancialTable(NamedTuple):
+    """Line items of one document as a dense ``(items, periods)`` array.
+
+    Missing figures are NaN. Periods are ordered as the document lists them
+    (usually most recent first).
+    """
+
+    periods: List[str]
+    values: np.ndarray
+
+    def item(self, name: str) -> np.ndarray:
+        return self.values[_ITEM_INDEX[name]]
+
+
+def extract_line_items(text: str, max_periods: int = 4) -> FinancialTable:
+    """Pull labelled line items and their per-period values out of document text.
+
+    Args:
+        text (str): Extracted document text.
+        max_periods (int): Maximum number of period columns kept.
+
+    Returns:
+        FinancialTable: Values for every item in ``ITEMS``.
+    """
+    values = np.full((len(ITEMS), max_periods), np.nan)
+    found = np.zeros(len(ITEMS), dtype=bool)
+    periods: Optional[List[str]] = None
+    header: Optional[List[str]] = None
+
+    for line in text.split("\n"):
+        if _HEADER_LINE.match(line):
+            header = [" ".join(p.split()) for p in _PERIOD_TOKEN.findall(line)]
+            continue
+        if found.all():
+            break
+        row = _split_row(line)
+        if row is None:
+            continue
+        label, tokens = row
+        item = classify_label(label)
+        if item < 0 or found[item]:
+            continue
+        tokens = [t for t in tokens if not t.endswith("%")]
+        if all(_YEAR.match(t) for t in tokens):
+            continue  # e.g. "Revenue recognition 2025 2024" is prose, not figures
+        numbers = [parse_number(t) for t in tokens][:max_periods]
+        if not numbers:
+            continue
+        values[item, : len(numbers)] = numbers
+        found[item] = True
+        if periods is None and header:
+            periods = header[:max_periods]
+
+    width = max_periods - int(np.all(np.isnan(values), axis=0)[::-1].cumprod().sum())
+    width = max(width, 1)
+    labels = list(periods or [])[:width]
+    labels += [f"P{i}" for i in range(len(labels), width)]
+    return FinancialTable(labels, values[:, :width])
+
+
+def compute_ratios(values: np.ndarray) -> np.ndarray:
+    """Compute every ratio in ``RATIOS`` for each period in one vectorised pass.
+
+    Args:
+        values (np.ndarray): Line items shaped ``(..., items, periods)``; a
+            leading batch axis computes many documents at once.
+
+    Returns:
+        np.ndarray: Ratios shaped ``(..., ratios, periods)``; NaN where an
+        input is missing or the denominator is zero.
+    """
+    numerators = values[..., _NUMERATORS, :]
+    denominators = values[..., _DENOMINATORS, :]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratios = numerators / denominators
+    ratios[~np.isfinite(ratios)] = np.nan
+    return ratios
+
+
+def period_deltas(values: np.ndarray) -> np.ndarray:
+    """Relative change of each row between consecutive periods.
+
+    Periods are ordered most recent first, so column ``i`` holds the change
+    from period ``i + 1`` to period ``i``.
+    """
+    current, previous = values[..., :-1], values[..., 1:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        deltas = (current - previous) / np.abs(previous)
+    deltas[~np.isfinite(deltas)] = np.nan
+    return deltas
+
+
+def compute_ratios_batch(texts: Sequence[str], max_periods: int = 4):
+    """Extract and compute ratios for many documents at once.
+
+    Returns:
+        tuple: ``(tables, ratios, deltas)`` where ``ratios`` is shaped
+        ``(documents, ratios, periods)`` and ``deltas`` is shaped
+        ``(documents, items, periods - 1)``.
+    """
+    tables = [extract_line_items(text, max_periods) for text in texts]
+    stacked = np.full((len(tables), len(ITEMS), max_periods), np.nan)
+    for i, table in enumerate(tables):
+        stacked[i, :, : table.values.shape[1]] = table.values
+    return tables, compute_ratios(stacked), period_deltas(stacked)
+
+
+def _fmt(value: float, percent: bool = False) -> str:
+    value = float(value)
+    if np.isnan(value):
+        return "n/a"
+    if percent:
+        return f"{value * 100:.1f}%"
+    return f"{value:,.0f}" if value.is_integer() or abs(value) >= 1000 else f"{value:,.2f}"
+
+
+def format_table(table: FinancialTable) -> str:
+    """Render line items, ratios and period-over-period changes compactly."""
+    present = ~np.all(np.isnan(table.values), axis=1)
+    if not present.any():
+        return "No labelled financial statement line items were found in the document."
+
+    ratios = compute_ratios(table.values)
+    deltas = period_deltas(table.values)
+    has_delta = table.values.shape[1] > 1
+    header = f"{'':<24}" + "".join(f"{p:>14}" for p in table.periods)
+    if has_delta:
+        header += f"{'vs prior':>10}"
+
+    lines = ["Line items (as reported)", header]
+    for i, name in enumerate(ITEMS):
+        if not present[i]:
+            continue
+        row = f"{name:<24}" + "".join(f"{_fmt(v):>14}" for v in table.values[i])
+        if has_delta:
+            row += f"{_fmt(deltas[i, 0], percent=True):>10}"
+        lines.append(row)
+
+    lines += ["", "Ratios", header[: 24 + 14 * len(table.periods)]]
+    for i, name in enumerate(RATIOS):
+        if np.all(np.isnan(ratios[i])):
+            continue
+        lines.append(
+            f"{name:<24}" + "".join(f"{_fmt(v, name in PERCENT_RATIOS):>14}" for v in ratios[i])
+        )
+    return "\n".join(lines)
+
+
+def ratio_summary(text: str) -> Dict[str, Dict[str, float]]:
+    """Latest-period line items and ratios as plain floats (NaNs dropped)."""
+    table = extract_line_items(text)
+    ratios = compute_ratios(table.values)
+    return {
+        "items": {name: float(v) for name, v in zip(ITEMS, table.values[:, 0]) if not np.isnan(v)},
+        "ratios": {name: float(v) for name, v in zip(RATIOS, ratios[:, 0]) if not np.isnan(v)},
+    }
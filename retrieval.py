@@ -0,0 +1,171 @@
+## Importing libraries and files
+import re
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+# Sections of a filing, in the order their headings are checked. A short line
+# matching one of these starts a new section for every chunk that follows.
+SECTION_PATTERNS = {
+    "income_statement": re.compile(
+        r"statements? of (consolidated )?(operations|income|earnings|comprehensive income)"
+        r"|income statements?|profit and loss",
+        re.IGNORECASE,
+    ),
+    "balance_sheet": re.compile(
+        r"balance sheets?|statements? of financial (position|condition)", re.IGNORECASE
+    ),
+    "cash_flow": re.compile(r"statements? of cash flows?|cash flow statements?", re.IGNORECASE),
+    "risk_factors": re.compile(r"risk factors", re.IGNORECASE),
+    "mdna": re.compile(r"management'?s discussion and analysis|\bmd&a\b", re.IGNORECASE),
+}
+DEFAULT_SECTION = "other"
+SECTIONS = tuple(SECTION_PATTERNS) + (DEFAULT_SECTION,)
+
+# Headings are short and are not sentences; long lines or lines ending in a
+# full stop that mention "balance sheet" are body text.
+MAX_HEADING_LENGTH = 100
+CHUNK_WORDS = 180
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:[.,][0-9]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def detect_section(line: str) -> Optional[str]:
+    """Return the section a heading line opens, or None for body text."""
+    if len(line) > MAX_HEADING_LENGTH or line.rstrip().endswith("."):
+        return None
+    for section, pattern in SECTION_PATTERNS.items():
+        if pattern.search(line):
+            return section
+    return None
+
+
+class Chunk(NamedTuple):
+    section: str
+    offset: int
+    text: str
+
+
+def chunk_text(text: str, chunk_words: int = CHUNK_WORDS) -> List[Chunk]:
+    """Split document text into chunks of about ``chunk_words`` words.
+
+    A chunk never spans two sections; each is tagged with the section it
+    belongs to and its character offset in ``text``.
+    """
+    chunks: List[Chunk] = []
+    section = DEFAULT_SECTION
+    lines: List[str] = []
+    words = 0
+    start = 0
+    offset = 0
+
+    def flush():
+        if lines:
+            chunks.append(Chunk(section, start, "\n".join(lines)))
+
+    for line in text.split("\n"):
+        heading = detect_section(line)
+        if (heading is not None and heading != section) or words >= chunk_words:
+            flush()
+            lines, words, start = [], 0, offset
+            section = heading or section
+        if line.strip():
+            lines.append(line)
+            words += len(line.split())
+        offset += len(line) + 1
+    flush()
+    return chunks
+
+
+## Creating the BM25 index
+class SearchResult(NamedTuple):
+    score: float
+    chunk: Chunk
+
+
+class DocumentIndex:
+    """Offline BM25 index over the section-tagged chunks of one document.
+
+    Postings are stored as flat NumPy arrays (CSR layout: for term ``t``,
+    ``indptr[t]:indptr[t + 1]`` slices its documents and frequencies), so a
+    query costs one vectorised update per query term.
+
+    Args:
+        text (str): Full document text.
+        k1 (float): BM25 term-frequency saturation.
+        b (float): BM25 length normalisation.
+    """
+
+    def __init__(self, text: str, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.chunks = chunk_text(text)
+        self.sections = np.array([chunk.section for chunk in self.chunks])
+        self.vocabulary: Dict[str, int] = {}
+
+        term_ids: List[int] = []
+        doc_ids: List[int] = []
+        lengths = np.zeros(len(self.chunks), dtype=np.float64)
+        for doc, chunk in enumerate(self.chunks):
+            tokens = tokenize(chunk.text)
+            lengths[doc] = len(tokens)
+            for token in tokens:
+                term_ids.append(self.vocabulary.setdefault(token, len(self.vocabulary)))
+            doc_ids.extend([doc] * len(tokens))
+
+        n_docs = max(len(self.chunks), 1)
+        pairs, counts = np.unique(
+            np.asarray(term_ids, dtype=np.int64) * n_docs + np.asarray(doc_ids, dtype=np.int64),
+            return_counts=True,
+        )
+        terms = pairs // n_docs
+        self.postings_docs = (pairs % n_docs).astype(np.int32)
+        self.postings_tf = counts.astype(np.float64)
+        self.indptr = np.searchsorted(terms, np.arange(len(self.vocabulary) + 1))
+
+        df = np.diff(self.indptr).astype(np.float64)
+        self.idf = np.log1p((len(self.chunks) - df + 0.5) / (df + 0.5))
+        self.norm = k1 * (1 - b + b * lengths / max(lengths.mean(), 1.0)) if len(lengths) else lengths
+
+    def search(self, query: str, top_k: int = 5, section: Optional[str] = None) -> List[SearchResult]:
+        """Return the ``top_k`` chunks most relevant to ``query``.
+
+        Args:
+            query (str): Free-text query.
+            top_k (int): Number of results.
+            section (str, optional): Restrict results to one of ``SECTIONS``.
+        """
+        scores = np.zeros(len(self.chunks), dtype=np.float64)
+        for token in set(tokenize(query)):
+            term = self.vocabulary.get(token)
+            if term is None:
+                continue
+            lo, hi = self.indptr[term], self.indptr[term + 1]
+            docs = self.postings_docs[lo:hi]
+            tf = self.postings_tf[lo:hi]
+            scores[docs] += self.idf[term] * tf * (self.k1 + 1) / (tf + self.norm[docs])
+
+        if section:
+            scores[self.sections != section] = 0.0
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [SearchResult(float(scores[doc]), self.chunks[doc]) for doc in ranked]
+
+
+def format_results(results: List[SearchResult]) -> str:
+    """Render search results as numbered excerpts for an agent."""
+    if not results:
+        return "No matching excerpts found. Try different keywords or another section."
+    excerpts = []
+    for rank, result in enumerate(results, start=1):
+        chunk = result.chunk
+        excerpts.append(
+            f"[{rank}] section={chunk.section} offset={chunk.offset} score={result.score:.2f}\n{chunk.text}"
+        )
+    return "\n\n".join(excerpts)
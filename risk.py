@@ -0,0 +1,254 @@
+## Importing libraries and files
+import re
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from ratios import FinancialTable, extract_line_items
+
+RATINGS = ("Low", "Medium", "High")
+
+# Risk-factor language: rule name -> (category, weight, pattern). Weight 3
+# marks disclosures that are material on their own (e.g. going-concern doubt)
+# and rate their category High regardless of how often they appear, but only
+# when stated affirmatively (see scan_risk_language). A bare "going concern"
+# is not a rule: most filings mention the going-concern basis or evaluation.
+RISK_RULES = {
+    "going_concern": ("liquidity", 3, r"substantial doubt|going concern (doubt|uncertainty|qualification|warning)"),
+    "liquidity": ("liquidity", 1, r"liquidity (risk|constraints?|shortfall)|insufficient (cash|liquidity)"),
+    "default": ("credit", 3, r"event of default|defaulted on|covenant (breach|violation)|breach(ed)? (of )?(our )?covenants?"),
+    "indebtedness": ("credit", 1, r"indebtedness|leverage|credit rating downgrade|refinanc\w*"),
+    "interest_rate": ("market", 1, r"interest rates?"),
+    "currency": ("market", 1, r"foreign (currency|exchange)|exchange rates?"),
+    "commodity": ("market", 1, r"commodity prices?|raw material (costs?|prices?)|inflation\w*"),
+    "competition": ("market", 1, r"competition|competitive pressure|pricing pressure"),
+    "demand": ("market", 1, r"decline in demand|economic (downturn|slowdown)|recession"),
+    "supply_chain": ("operational", 1, r"supply chain|shortages? of|disruptions?"),
+    "cyber": ("operational", 1, r"cyber[- ]?(attack|security|incident)s?|data breach(es)?"),
+    "key_personnel": ("operational", 1, r"key personnel|dependence on (our )?(ceo|founder|management)"),
+    "material_weakness": ("regulatory", 3, r"material weakness(es)?|restatement"),
+    "litigation": ("regulatory", 1, r"litigation|lawsuits?|legal proceedings"),
+    "regulation": ("regulatory", 1, r"regulatory (investigation|action|scrutiny)|investigations?|sanctions|penalt(y|ies)"),
+}
+CATEGORIES = ("liquidity", "credit", "market", "operational", "regulatory")
+
+
+def _leading_letters(pattern: str) -> set:
+    """Letters a match of ``pattern`` can start with (a superset is fine)."""
+    letters, depth, start = set(), 0, True
+    for char in pattern:
+        if start and char.isalpha():
+            letters.add(char.lower())
+        start = False
+        if char == "(":
+            depth += 1
+            start = True
+        elif char == ")":
+            depth -= 1
+        elif char == "|" and depth <= 1:
+            start = True
+    return letters
+
+
+# One alternation with a named group per rule: a single finditer pass over
+# the text classifies every hit. The lookahead on the possible first letters
+# lets the regex engine skip most positions without trying every rule.
+_RISK_LETTERS = "".join(sorted(set().union(*(_leading_letters(p) for _, _, p in RISK_RULES.values()))))
+_RISK_PATTERN = re.compile(
+    rf"\b(?=[{_RISK_LETTERS}])(?:"
+    + "|".join(rf"(?P<{name}>{pattern})" for name, (_, _, pattern) in RISK_RULES.items())
+    + r")\b",
+    re.IGNORECASE,
+)
+
+# A hit preceded in its sentence by a negation is not a disclosure of the
+# risk: "there were no material weaknesses", "management did not identify
+# substantial doubt".
+_NEGATION = re.compile(r"\b(?:no|not|none|never|neither|nor|without)\b|n't\b", re.IGNORECASE)
+# Hedged or hypothetical wording ("could result in a material weakness",
+# "whether conditions raise substantial doubt") and definitions ("A material
+# weakness is a deficiency ...") are ordinary risk language, not critical.
+_HEDGE = re.compile(
+    r"\b(?:may|might|could|would|should|can|if|whether|unless|upon|any|potential(?:ly)?|possible)\b",
+    re.IGNORECASE,
+)
+_DEFINITION = re.compile(r"\s+(?:is|are|means)\s+(?:a|an|defined)\b", re.IGNORECASE)
+_SENTENCE_END = re.compile(r"[.!?;]\s")
+# How far back to look for the start of a hit's sentence.
+SENTENCE_LOOKBACK = 200
+
+# Weighted hits per 100k characters at which a category becomes Medium / High.
+# A 10-K's Risk Factors section alone puts the busiest categories (market,
+# operational) at roughly 10-25, so language alone rates them Medium at most
+# unless it is unusually concentrated; the statements and critical
+# disclosures decide High.
+MEDIUM_DENSITY = 15.0
+HIGH_DENSITY = 40.0
+MAX_EVIDENCE = 3
+SNIPPET_CHARS = 80
+
+
+class Evidence(NamedTuple):
+    offset: int
+    snippet: str
+
+
+class RiskItem(NamedTuple):
+    category: str
+    rating: str
+    reasons: List[str]
+    evidence: List[Evidence]
+
+
+def _snippet(text: str, start: int, end: int) -> str:
+    half = (SNIPPET_CHARS - (end - start)) // 2
+    lo, hi = max(0, start - max(half, 0)), min(len(text), end + max(half, 0))
+    return " ".join(text[lo:hi].split())
+
+
+def _sentence_prefix(text: str, start: int) -> str:
+    """The part of the sentence containing ``start`` that precedes it."""
+    window = text[max(0, start - SENTENCE_LOOKBACK) : start]
+    end = None
+    for end in _SENTENCE_END.finditer(window):
+        pass
+    return window[end.end() :] if end is not None else window
+
+
+def _raise_rating(current: str, new: str) -> str:
+    return max(current, new, key=RATINGS.index)
+
+
+def scan_risk_language(text: str) -> Tuple[Dict[str, float], Dict[str, int], Dict[str, List[Evidence]], Dict[str, bool]]:
+    """Scan the text once for risk-factor language.
+
+    Negated hits and repeats of the same wording are dropped, and critical
+    (weight 3) rules only count as critical when the sentence states them as
+    fact.
+
+    Returns:
+        tuple: Weighted score, hit count, first few evidence offsets and
+        whether a critical (weight 3) rule fired, each keyed by category.
+    """
+    scores: Dict[str, float] = defaultdict(float)
+    hits: Dict[str, int] = defaultdict(int)
+    evidence: Dict[str, List[Evidence]] = defaultdict(list)
+    critical: Dict[str, bool] = defaultdict(bool)
+    seen = set()
+    for match in _RISK_PATTERN.finditer(text):
+        category, weight, _ = RISK_RULES[match.lastgroup]
+        prefix = _sentence_prefix(text, match.start())
+        if _NEGATION.search(prefix):
+            continue
+        if weight >= 3 and (_HEDGE.search(prefix) or _DEFINITION.match(text, match.end())):
+            weight = 1
+        # The same wording repeated (a paragraph printed on every page, a
+        # running header) is one mention, not many.
+        snippet = _snippet(text, match.start(), match.end())
+        if (match.lastgroup, snippet.lower()) in seen:
+            continue
+        seen.add((match.lastgroup, snippet.lower()))
+        scores[category] += weight
+        hits[category] += 1
+        # Keep the first few hits, plus the first critical one wherever it is.
+        if len(evidence[category]) < MAX_EVIDENCE or (weight >= 3 and not critical[category]):
+            evidence[category].append(Evidence(match.start(), snippet))
+        if weight >= 3:
+            critical[category] = True
+    return scores, hits, evidence, critical
+
+
+def _metric_rules(table: FinancialTable) -> Dict[str, List[Tuple[str, str]]]:
+    """Threshold rules on leverage, liquidity and cash burn (latest period)."""
+    latest = {name: table.item(name)[0] for name in (
+        "total_debt", "equity", "current_assets", "current_liabilities",
+        "cash", "operating_cash_flow", "capex", "net_income",
+    )}
+    findings: Dict[str, List[Tuple[str, str]]] = defaultdict(list)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        debt_to_equity = latest["total_debt"] / latest["equity"]
+        current_ratio = latest["current_assets"] / latest["current_liabilities"]
+        # Capex is printed as an outflow, often in parentheses ("(3,000)"), which
+        # parses as negative; its size is what is spent either way.
+        free_cash_flow = latest["operating_cash_flow"] - np.abs(np.nan_to_num(latest["capex"]))
+        runway = latest["cash"] / -latest["operating_cash_flow"]
+
+    if latest["equity"] <= 0:
+        findings["credit"].append(("High", f"negative stockholders' equity ({latest['equity']:,.0f})"))
+    elif debt_to_equity > 2:
+        findings["credit"].append(("High", f"debt-to-equity {debt_to_equity:.2f} > 2.0"))
+    elif debt_to_equity > 1:
+        findings["credit"].append(("Medium", f"debt-to-equity {debt_to_equity:.2f} > 1.0"))
+
+    if current_ratio < 1:
+        findings["liquidity"].append(("High", f"current ratio {current_ratio:.2f} < 1.0"))
+    elif current_ratio < 1.5:
+        findings["liquidity"].append(("Medium", f"current ratio {current_ratio:.2f} < 1.5"))
+
+    if latest["operating_cash_flow"] < 0:
+        rating = "High" if runway < 2 else "Medium"
+        findings["liquidity"].append(
+            (rating, f"operating cash burn {latest['operating_cash_flow']:,.0f}; cash covers {runway:.1f} periods")
+        )
+    elif free_cash_flow < 0:
+        findings["liquidity"].append(("Medium", f"negative free cash flow ({free_cash_flow:,.0f})"))
+
+    if latest["net_income"] < 0:
+        findings["operational"].append(("Medium", f"net loss ({latest['net_income']:,.0f})"))
+    return findings
+
+
+## Creating the risk register
+def assess_risk(text: str, table: Optional[FinancialTable] = None) -> List[RiskItem]:
+    """Build a Low/Medium/High risk register for a document.
+
+    Args:
+        text (str): Extracted document text.
+        table (FinancialTable, optional): Pre-extracted line items; extracted
+            from ``text`` when not given.
+
+    Returns:
+        List[RiskItem]: One entry per category, highest rating first.
+    """
+    scores, hits, evidence, critical = scan_risk_language(text)
+    metrics = _metric_rules(table if table is not None else extract_line_items(text))
+    scale = max(len(text) / 100_000, 1.0)
+
+    register = []
+    for category in CATEGORIES:
+        density = scores[category] / scale
+        rating = "Low"
+        reasons = []
+        if hits[category]:
+            reasons.append(f"{hits[category]} risk-language mentions")
+        if critical[category]:
+            rating = "High"
+            reasons.append("critical disclosure present")
+        elif density >= HIGH_DENSITY:
+            rating = "High"
+        elif density >= MEDIUM_DENSITY:
+            rating = "Medium"
+        for metric_rating, reason in metrics.get(category, []):
+            rating = _raise_rating(rating, metric_rating)
+            reasons.append(reason)
+        register.append(RiskItem(category, rating, reasons, evidence[category]))
+
+    register.sort(key=lambda item: RATINGS.index(item.rating), reverse=True)
+    return register
+
+
+def overall_rating(register: List[RiskItem]) -> str:
+    """The worst rating in the register."""
+    return max((item.rating for item in register), key=RATINGS.index, default="Low")
+
+
+def format_register(register: List[RiskItem]) -> str:
+    """Render the risk register for an agent."""
+    lines = [f"Overall risk profile: {overall_rating(register)}", "", "Risk register"]
+    for item in register:
+        reasons = "; ".join(item.reasons) or "no indicators found"
+        lines.append(f"- {item.category}: {item.rating} ({reasons})")
+        for evidence in item.evidence:
+            lines.append(f"    @{evidence.offset}: \"{evidence.snippet}\"")
+    return "\n".join(lines)
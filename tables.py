@@ -0,0 +1,264 @@
+## Importing libraries and files
+import re
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ratios import ITEMS, FinancialTable, classify_label, parse_number, strip_footnotes
+
+# One row per figure. Labels, periods and units are short fixed-width UTF-8
+# strings so the array has no Python objects and can be memory-mapped.
+FACT_DTYPE = np.dtype(
+    [
+        ("item", "i1"),  # index into ratios.ITEMS, -1 for rows that are not a known line item
+        ("label", "S64"),  # row label as printed (truncated)
+        ("period", "S16"),  # column header, or P0, P1, ... when the table has none
+        ("value", "f8"),
+        ("unit", "S10"),  # thousands, millions, billions, percent, per_share or empty
+        ("page", "u4"),  # 1-based page number
+        ("row", "u4"),  # table row number in the document; the figures of a row share it
+    ]
+)
+MAX_LOOKUP_ROWS = 20
+
+_FIGURE = re.compile(r"(?<!\S)\(?-?\d[\d,]*(?:\.\d+)?\)?%?(?!\S)")
+_PERIOD = re.compile(r"(?:Q[1-4]\s*)?(?:FY\s*)?(?:19|20)\d{2}", re.IGNORECASE)
+_HEADER = re.compile(rf"\s*(?:{_PERIOD.pattern}\s*)+", re.IGNORECASE)
+_YEAR = re.compile(r"^(?:19|20)\d{2}$")
+# Bare numbers that can be part of a row label: years, note numbers.
+_LABEL_NUMBER = re.compile(r"\d{1,4}")
+# Dashes standing in for an empty cell, and currency signs printed apart from the figure.
+_BLANK_CELL = re.compile(r"(?<!\S)[$\u2014\u2013-](?!\S)|\$")
+_UNIT = re.compile(r"\bin (thousands|millions|billions)\b", re.IGNORECASE)
+_PER_SHARE = re.compile(r"per (common )?share|\beps\b", re.IGNORECASE)
+_EPS = ITEMS.index("eps")
+# Running headers and footers such as "Annual Report - Page 12".
+_PAGE_MARKER = re.compile(r"\bpage$", re.IGNORECASE)
+# Cheap test on a page's plain text: table pages have several lines that
+# start with words and end with amounts. A single bare number (a page
+# number, note or item reference, a year) does not count; the line needs
+# an amount-like figure (thousands separator, decimals, parentheses, $ or %)
+# or at least two figures in a row.
+# Lines are checked token by token from the end, never with one regex over
+# the whole line, so the cost stays linear however long the line is.
+_AMOUNT = re.compile(r"\(?-?\$?(?:\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+\.\d+)\)?%?|\(\$?\d+\)|\$\d+|\d+%")
+_NUMBER = re.compile(r"\(?-?\$?\d[\d,]*(?:\.\d+)?\)?%?")
+MIN_TABLE_LINES = 3
+
+# Lines recovered from a page, in order: ("unit", str), ("header", periods)
+# or ("row", label, figures) where periods and figures are (text, column end).
+PageLines = List[tuple]
+Cell = Tuple[str, int]
+
+
+def _is_table_line(line: str) -> bool:
+    tokens = line.split()
+    if len(tokens) < 2 or not (tokens[0][0].isascii() and tokens[0][0].isalpha()):
+        return False
+    if _AMOUNT.fullmatch(tokens[-1]):
+        return True
+    return all(_NUMBER.fullmatch(token) for token in tokens[-2:])
+
+
+def looks_tabular(text: str) -> bool:
+    """Whether a page's plain text is worth a (slower) layout extraction."""
+    count = 0
+    for line in text.split("\n"):
+        count += _is_table_line(line)
+        if count >= MIN_TABLE_LINES:
+            return True
+    return False
+
+
+def parse_layout(text: str) -> PageLines:
+    """Recover table headers, units and rows from a page's layout-mode text.
+
+    Layout mode keeps the horizontal position of every word, so each figure
+    can later be matched to the period column printed above it.
+    """
+    lines: PageLines = []
+    for line in text.split("\n"):
+        unit = _UNIT.search(line)
+        if unit:
+            lines.append(("unit", unit.group(1).lower()))
+        if _HEADER.fullmatch(line):
+            periods = [(" ".join(m.group().split()), m.end()) for m in _PERIOD.finditer(line)]
+            lines.append(("header", periods))
+            continue
+        row = _parse_row(_BLANK_CELL.sub(lambda m: " " * len(m.group()), strip_footnotes(line)))
+        if row is not None:
+            lines.append(("row", *row))
+    return lines
+
+
+def _parse_row(line: str) -> Optional[Tuple[str, List[Cell]]]:
+    line = line.rstrip()
+    figures = []
+    end = len(line)
+    # Figures are the run of numbers at the end of the line.
+    for match in reversed(list(_FIGURE.finditer(line))):
+        if line[match.end() : end].strip():
+            break
+        figures.append(match)
+        end = match.start()
+    if not figures:
+        return None
+    label = line[:end].strip().rstrip(".: ")
+    if not label or not label[0].isalpha() or _PAGE_MARKER.search(label):
+        return None
+    cells = [(m.group(), m.end()) for m in reversed(figures)]
+    if all(_YEAR.match(text) for text, _ in cells):
+        return None  # e.g. "Revenue recognition 2025 2024" is prose, not figures
+    return label, cells
+
+
+def _columns(
+    label: str, cells: Sequence[Cell], header: Optional[List[Cell]]
+) -> Tuple[str, List[Tuple[str, str]]]:
+    """Pair each figure with its period; returns the label and ``(figure, period)`` pairs.
+
+    Bare numbers printed left of the first column belong to the label (e.g.
+    the year in "Notes due 2027"). A full row is read column by column; a row
+    with empty cells is matched to the columns whose right edges are nearest.
+    Without a header, columns are numbered.
+    """
+    if not header:
+        return label, [(text, f"P{i}") for i, (text, _) in enumerate(cells)]
+    ends = [end for _, end in header]
+    gaps = [b - a for a, b in zip(ends, ends[1:])]
+    tolerance = min(gaps) // 2 if gaps else 6
+    cells = list(cells)
+    while len(cells) > 1 and cells[0][1] < ends[0] - tolerance and _LABEL_NUMBER.fullmatch(cells[0][0]):
+        label = f"{label} {cells.pop(0)[0]}"
+    periods = [period for period, _ in header]
+    if len(cells) < len(header):
+        columns = [min(range(len(ends)), key=lambda c: abs(ends[c] - end)) for _, end in cells]
+        if all(a < b for a, b in zip(columns, columns[1:])):
+            return label, [(text, periods[c]) for (text, _), c in zip(cells, columns)]
+    # Right-aligned: any extra leading figures get numbered columns.
+    extra = max(0, len(cells) - len(periods))
+    named = [f"P{i}" for i in range(extra)] + periods[len(periods) - (len(cells) - extra) :]
+    return label, [(text, period) for (text, _), period in zip(cells, named)]
+
+
+def build_facts(pages: Iterable[PageLines]) -> np.ndarray:
+    """Assemble the recovered lines of every page into a fact array.
+
+    Headers and units carry over to later pages until a new one is printed,
+    so statements continued on the next page keep their columns.
+
+    Args:
+        pages: The output of :func:`parse_layout` for each page, in order.
+
+    Returns:
+        np.ndarray: Facts with dtype ``FACT_DTYPE``, in document order.
+    """
+    records = []
+    header = None
+    unit = ""
+    row_number = 0
+    for page, lines in enumerate(pages, start=1):
+        for kind, *payload in lines:
+            if kind == "unit":
+                unit = payload[0]
+                continue
+            if kind == "header":
+                header = payload[0]
+                continue
+            label, pairs = _columns(*payload, header)
+            if not pairs:
+                continue
+            percent = any(text.endswith("%") for text, _ in pairs)
+            # Percentages (e.g. "Gross margin 21.5%") are never the line item's amount.
+            # Labels must name the item outright (see ratios.classify_label).
+            item = -1 if percent else classify_label(label)
+            row_unit = "percent" if percent else "per_share" if item == _EPS or _PER_SHARE.search(label) else unit
+            encoded = label.encode("utf-8")[:64]
+            for text, period in pairs:
+                records.append(
+                    (item, encoded, period.encode("utf-8")[:16], parse_number(text), row_unit, page, row_number)
+                )
+            row_number += 1
+    return np.array(records, dtype=FACT_DTYPE)
+
+
+def financial_table(facts: np.ndarray, max_periods: int = 4) -> Optional[FinancialTable]:
+    """The first row of every known line item as a ``ratios.FinancialTable``.
+
+    Mirrors ``ratios.extract_line_items``: statements list the headline
+    figure before any breakdown, and the periods are those of the first
+    line item found. Figures are placed by period, so an empty cell stays
+    empty; rows under a different header are placed by position.
+
+    Returns:
+        FinancialTable: The line items, or None if no table row names one.
+    """
+    known = facts[facts["item"] >= 0]
+    if not len(known):
+        return None
+    values = np.full((len(ITEMS), max_periods), np.nan)
+    first_rows = {}
+    for item, row in zip(known["item"], known["row"]):
+        first_rows.setdefault(int(item), int(row))
+    periods = list(dict.fromkeys(known["period"][known["row"] == min(first_rows.values())].tolist()))
+    periods = periods[:max_periods]
+    for item, row in first_rows.items():
+        figures = known[known["row"] == row]
+        if all(p in periods for p in figures["period"].tolist()):
+            for period, value in zip(figures["period"].tolist(), figures["value"]):
+                values[item, periods.index(period)] = value
+        else:
+            values[item, : min(len(figures), max_periods)] = figures["value"][:max_periods]
+
+    width = max(1, max_periods - int(np.all(np.isnan(values), axis=0)[::-1].cumprod().sum()))
+    labels = [p.decode("utf-8") for p in periods[:width]]
+    labels += [f"P{i}" for i in range(len(labels), width)]
+    return FinancialTable(labels, values[:, :width])
+
+
+def lookup(facts: np.ndarray, line_item: str, period: str = "") -> np.ndarray:
+    """Facts whose label contains every word of ``line_item`` (case-insensitive).
+
+    ``line_item`` may also be a line item name from ``ratios.ITEMS`` such as
+    ``net_income``. A non-empty ``period`` keeps only columns containing it.
+    """
+    if line_item.strip().lower() in ITEMS:
+        mask = facts["item"] == ITEMS.index(line_item.strip().lower())
+    else:
+        labels = np.char.lower(facts["label"])
+        mask = np.ones(len(facts), dtype=bool)
+        for word in line_item.lower().split():
+            mask &= np.char.find(labels, word.encode("utf-8")) >= 0
+    if period.strip():
+        mask &= np.char.find(np.char.lower(facts["period"]), period.strip().lower().encode("utf-8")) >= 0
+    return facts[mask]
+
+
+def _fmt(value: float, unit: str) -> str:
+    if unit == "percent":
+        return f"{value:g}%"
+    return f"{value:,.0f}" if float(value).is_integer() else f"{value:,.2f}"
+
+
+def format_facts(facts: np.ndarray, limit: int = MAX_LOOKUP_ROWS) -> str:
+    """Render facts one table row per line, skipping rows repeated verbatim."""
+    if not len(facts):
+        return "No matching figures were found in the document's tables."
+    lines = []
+    seen = set()
+    for row in dict.fromkeys(facts["row"].tolist()):
+        figures = facts[facts["row"] == row]
+        cells = "  ".join(
+            f"{p.decode('utf-8')}: {_fmt(v, u.decode('utf-8'))}"
+            for p, v, u in zip(figures["period"], figures["value"], figures["unit"])
+        )
+        label = figures["label"][0].decode("utf-8", errors="ignore")
+        if (label, cells) in seen:
+            continue
+        seen.add((label, cells))
+        unit = figures["unit"][0].decode("utf-8")
+        lines.append(f"{label} ({unit or 'as reported'}, page {figures['page'][0]}): {cells}")
+        if len(lines) == limit:
+            lines.append("... more rows omitted; narrow the line item or period.")
+            break
+    return "\n".join(lines)
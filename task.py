@@ -2,14 +2,51 @@
 from crewai import Task
 
 from agents import financial_analyst, verifier, investment_advisor, risk_assessor
-from tools import search_tool, FinancialDocumentTool
+from tools import FinancialDocumentTool, InvestmentTool, RiskTool
+
+# BUG FIX 15 (Prompt): Description told verifier to guess and hallucinate.
+# BUG FIX 16 (Code): Had broken indentation causing IndentationError at import time.
+# BUG FIX 17 (Code): Task was assigned to financial_analyst; should use verifier agent
+# Defined first: the pipeline gates every later task on its PASS/FAIL verdict.
+# Each task's `context` lists the tasks whose output it needs; the pipeline runs a
+# task as soon as those have finished, so tasks sharing a context run concurrently.
+verification = Task(
+    description=(
+        "Verify the uploaded document before any analysis takes place.\n"
+        "The document is located at: {file_path}\n"
+        "Use the document search tool to look for the issuer, reporting period and "
+        "the main financial statements.\n\n"
+        "Your verification must:\n"
+        "1. Confirm the file is readable and not corrupted\n"
+        "2. Identify whether it is a recognised financial document type "
+        "(annual report, 10-K, earnings release, balance sheet, income statement, etc.)\n"
+        "3. Extract and confirm: issuer name, reporting period, currency, and auditor (if present)\n"
+        "4. Flag any concerns: missing sections, unusual formatting, or non-financial content\n"
+        "5. Provide a clear PASS or FAIL verdict with reasoning before analysis proceeds"
+    ),
+    expected_output=(
+        "A verification report containing:\n"
+        "- Document Type: identified category of financial document\n"
+        "- Issuer & Period: company name and reporting period extracted from the document\n"
+        "- Key Sections Present: list of major financial sections found (e.g. Income Statement, Balance Sheet)\n"
+        "- Concerns: any anomalies, missing data, or non-financial content detected\n"
+        "- Verdict: PASS or FAIL with a one-paragraph justification\n"
+        "Do not approve documents without actually reading them."
+    ),
+    agent=verifier,
+    tools=[FinancialDocumentTool.search_document_tool],
+    async_execution=False,
+)
 
 # BUG FIX 10 (Prompt): Description told the agent to ignore the query, make up URLs,
 # hallucinate analysis, and contradict itself. expected_output asked for jargon and
 # fabricated websites. Replaced with a focused, structured analysis task.
 analyze_financial_document = Task(
     description=(
-        "Read the uploaded financial document thoroughly using the document reading tool. "
+        "Search the uploaded financial document using the document search tool, "
+        "one query per metric or topic, and take exact statement figures from the "
+        "financial figures lookup tool rather than from the text. "
+        "The document is located at: {file_path}\n"
         "Then answer the user's query: {query}\n\n"
         "Your analysis must:\n"
         "1. Identify the document type, issuer, and reporting period\n"
@@ -29,7 +66,8 @@ analyze_financial_document = Task(
         "All figures must be sourced directly from the document. No invented URLs or data."
     ),
     agent=financial_analyst,
-    tools=[FinancialDocumentTool.read_data_tool],
+    tools=[FinancialDocumentTool.search_document_tool, FinancialDocumentTool.lookup_figures_tool],
+    context=[verification],
     async_execution=False,
 )
 
@@ -39,7 +77,12 @@ analyze_financial_document = Task(
 investment_analysis = Task(
     description=(
         "Based on the financial data extracted from the document, conduct an investment analysis "
-        "in response to the user's query: {query}\n\n"
+        "in response to the user's query: {query}\n"
+        "The document is located at: {file_path}\n"
+        "Start with the investment data tool, which computes the standard ratios directly "
+        "from the financial statements; use the financial figures lookup tool for any other "
+        "line item, and the document search tool (sections: income_statement, balance_sheet, "
+        "cash_flow) only for context neither covers.\n\n"
         "Your analysis must:\n"
         "1. Evaluate the company's financial health using standard ratios (P/E, D/E, ROE, current ratio, etc.)\n"
         "2. Identify key strengths and weaknesses from the financial statements\n"
@@ -57,7 +100,12 @@ investment_analysis = Task(
         "No fabricated data, no specific buy/sell recommendations, no imaginary websites."
     ),
     agent=investment_advisor,
-    tools=[FinancialDocumentTool.read_data_tool],
+    tools=[
+        InvestmentTool.analyze_investment_tool,
+        FinancialDocumentTool.lookup_figures_tool,
+        FinancialDocumentTool.search_document_tool,
+    ],
+    context=[analyze_financial_document],
     async_execution=False,
 )
 
@@ -67,7 +115,11 @@ investment_analysis = Task(
 risk_assessment = Task(
     description=(
         "Perform a structured risk assessment of the financial document in the context of "
-        "the user's query: {query}\n\n"
+        "the user's query: {query}\n"
+        "The document is located at: {file_path}\n"
+        "Start with the risk assessment tool, which returns a rule-based risk register with "
+        "evidence; use the document search tool (sections: risk_factors, mdna, balance_sheet, "
+        "cash_flow) to confirm or add context to its findings.\n\n"
         "Your assessment must:\n"
         "1. Identify financial risks (liquidity, credit, leverage) from the document's data\n"
         "2. Identify market and operational risks mentioned or implied in the report\n"
@@ -85,34 +137,7 @@ risk_assessment = Task(
         "should be validated by a qualified risk professional before decision-making.'"
     ),
     agent=risk_assessor,
-    tools=[FinancialDocumentTool.read_data_tool],
+    tools=[RiskTool.create_risk_assessment_tool, FinancialDocumentTool.search_document_tool],
+    context=[analyze_financial_document],
     async_execution=False,
 )
-
-# BUG FIX 15 (Prompt): Description told verifier to guess and hallucinate.
-# BUG FIX 16 (Code): Had broken indentation causing IndentationError at import time.
-# BUG FIX 17 (Code): Task was assigned to financial_analyst; should use verifier agent
-verification = Task(
-    description=(
-        "Verify the uploaded document before any analysis takes place.\n\n"
-        "Your verification must:\n"
-        "1. Confirm the file is readable and not corrupted\n"
-        "2. Identify whether it is a recognised financial document type "
-        "(annual report, 10-K, earnings release, balance sheet, income statement, etc.)\n"
-        "3. Extract and confirm: issuer name, reporting period, currency, and auditor (if present)\n"
-        "4. Flag any concerns: missing sections, unusual formatting, or non-financial content\n"
-        "5. Provide a clear PASS or FAIL verdict with reasoning before analysis proceeds"
-    ),
-    expected_output=(
-        "A verification report containing:\n"
-        "- Document Type: identified category of financial document\n"
-        "- Issuer & Period: company name and reporting period extracted from the document\n"
-        "- Key Sections Present: list of major financial sections found (e.g. Income Statement, Balance Sheet)\n"
-        "- Concerns: any anomalies, missing data, or non-financial content detected\n"
-        "- Verdict: PASS or FAIL with a one-paragraph justification\n"
-        "Do not approve documents without actually reading them."
-    ),
-    agent=verifier,
-    tools=[FinancialDocumentTool.read_data_tool],
-    async_execution=False
-)
\ No newline at end of file
@@ -1,22 +1,42 @@
 ## Importing libraries and files
-import os
+import inspect
+
 from dotenv import load_dotenv
 load_dotenv()
+from pydantic import create_model
 
 # BUG FIX 1: "from crewai_tools import tools" — imports the module, not anything useful.
-# This line is unused and would cause confusion. Removed entirely.
-from crewai_tools import SerperDevTool
+# This line is unused and would cause confusion. Removed entirely, together with the
+# SerperDevTool web search: no agent or task uses it, and crewai_tools alone added
+# seconds to every import of this module.
 
 # BUG FIX 3: Missing import for PDF loading. "Pdf" is used below but never imported.
-# LangChain's PyPDFLoader is the correct tool for this.
-from langchain_community.document_loaders import PyPDFLoader
+# LangChain's PyPDFLoader fixed it at first; the text now comes from the pypdf
+# extractor in extraction.py, parsed once per request by document.py.
+from document import get_document
+from ratios import format_table
+from risk import assess_risk, format_register
 
 # BUG FIX 4: Missing import for crewai's @tool decorator, required to expose
-# class methods as usable CrewAI tools.
-from crewai import tool
+# class methods as usable CrewAI tools. crewai 0.130 exports it from crewai.tools,
+# not from the top-level package.
+from crewai.tools import tool
+
+
+def keep_defaults(built_tool):
+    """Restore the function's default argument values on a ``@tool`` schema.
 
-## Creating search tool
-search_tool = SerperDevTool()
+    crewai builds a tool's argument schema from the annotations alone, so
+    every argument becomes required and a call that omits e.g. ``top_k``
+    fails validation instead of using the default.
+    """
+    parameters = inspect.signature(built_tool.func).parameters
+    fields = {
+        name: (param.annotation, ... if param.default is inspect.Parameter.empty else param.default)
+        for name, param in parameters.items()
+    }
+    built_tool.args_schema = create_model(built_tool.args_schema.__name__, **fields)
+    return built_tool
 
 
 ## Creating custom pdf reader tool
@@ -33,6 +53,7 @@ class FinancialDocumentTool:
     # require "self" as first arg, but it's called as FinancialDocumentTool.read_data_tool
     # (no instance), which would raise TypeError. Made it a @staticmethod.
     @staticmethod
+    @keep_defaults
     @tool("Read Financial Document")
     def read_data_tool(path: str = "data/sample.pdf") -> str:
         """Tool to read data from a PDF file at the given path.
@@ -43,29 +64,60 @@ class FinancialDocumentTool:
         Returns:
             str: Full text content of the financial document.
         """
-        if not os.path.exists(path):
-            return f"Error: File not found at '{path}'. Please provide a valid PDF path."
+        # The PDF is parsed once per request and shared by every tool call;
+        # see document.py.
+        document = get_document(path)
+        with document.span("tool:read_data"):
+            return document.read()
 
-        try:
-            loader = PyPDFLoader(file_path=path)
-            docs = loader.load()
-            full_report = ""
-            for data in docs:
-                content = data.page_content
+    @staticmethod
+    @keep_defaults
+    @tool("Search Financial Document")
+    def search_document_tool(
+        query: str, path: str = "data/sample.pdf", section: str = "", top_k: int = 5
+    ) -> str:
+        """Search the financial document and return only the most relevant excerpts.
 
-                # Clean and format the financial document data
-                while "\n\n" in content:
-                    content = content.replace("\n\n", "\n")
+        Prefer this over reading the full document: call it once per topic
+        (e.g. "total revenues net income", "total debt stockholders equity").
 
-                full_report += content + "\n"
+        Args:
+            query (str): Keywords describing the figures or topic to find.
+            path (str): Path of the PDF file. Defaults to 'data/sample.pdf'.
+            section (str): Optional filter: income_statement, balance_sheet,
+                cash_flow, risk_factors, mdna or other. Empty searches everything.
+            top_k (int): Number of excerpts to return. Defaults to 5.
+
+        Returns:
+            str: Numbered excerpts tagged with their section and character offset.
+        """
+        document = get_document(path)
+        with document.span("tool:search_document"):
+            return document.search(query, section=section, top_k=max(1, min(int(top_k), 20)))
+
+    @staticmethod
+    @keep_defaults
+    @tool("Look Up Financial Figures")
+    def lookup_figures_tool(line_item: str, path: str = "data/sample.pdf", period: str = "") -> str:
+        """Look up exact figures in the document's financial statement tables.
 
-            if not full_report.strip():
-                return "Warning: No extractable text found in the PDF. It may be a scanned image."
+        Returns the table rows whose label contains every word of ``line_item``,
+        with the value for each period column, the unit and the page. Faster
+        and more precise than searching the text for a number.
 
-            return full_report
+        Args:
+            line_item (str): Words of the row label, e.g. "total revenues" or
+                "cash and cash equivalents", or a standard name such as net_income.
+            path (str): Path of the PDF file. Defaults to 'data/sample.pdf'.
+            period (str): Optional column to keep, e.g. "2025" or "Q2 2025".
+                Empty returns every period.
 
-        except Exception as e:
-            return f"Error reading PDF: {str(e)}"
+        Returns:
+            str: One line per matching table row.
+        """
+        document = get_document(path)
+        with document.span("tool:lookup_figures"):
+            return document.lookup(line_item, period)
 
 
 ## Creating Investment Analysis Tool
@@ -73,29 +125,30 @@ class InvestmentTool:
 
     # BUG FIX 9: async def — same issue as above; must be synchronous for CrewAI.
     # BUG FIX 10: Missing @staticmethod and @tool decorator.
-    # BUG FIX 11: The while-loop for removing double spaces is O(n²) and mutates
-    # a string inside a loop using manual index tracking — fragile and slow.
-    # Replaced with a simple, correct one-liner.
     @staticmethod
+    @keep_defaults
     @tool("Analyze Investment Data")
-    def analyze_investment_tool(financial_document_data: str) -> str:
-        """Analyse pre-extracted financial document text for investment insights.
+    def analyze_investment_tool(path: str = "data/sample.pdf") -> str:
+        """Compute key financial ratios deterministically from the document's statements.
+
+        Extracts labelled line items (revenue, net income, total debt, equity,
+        current assets and liabilities, cash flow, ...) for every reported period
+        and returns them with margins, ROE, ROA, D/E, current ratio and P/E
+        (where share price and EPS are reported) plus period-over-period changes.
+        Use these figures instead of recomputing ratios by hand.
 
         Args:
-            financial_document_data (str): Raw text extracted from a financial PDF.
+            path (str): Path of the PDF file. Defaults to 'data/sample.pdf'.
 
         Returns:
-            str: Processed financial data ready for investment analysis.
+            str: Compact table of line items, ratios and changes.
         """
-        if not financial_document_data:
-            return "Error: No financial data provided for analysis."
-
-        # BUG FIX 11: Replaced broken O(n²) manual string mutation loop with
-        # a simple, correct approach
-        processed_data = " ".join(financial_document_data.split())
-
-        # TODO: Extend with ratio calculations, trend analysis, etc.
-        return processed_data
+        document = get_document(path)
+        with document.span("tool:analyze_investment"):
+            table = document.financial_table()
+            if table is None:
+                return document.load()  # the error or warning explaining why there is no text
+            return format_table(table)
 
 
 ## Creating Risk Assessment Tool
@@ -104,18 +157,27 @@ class RiskTool:
     # BUG FIX 12: async def — same synchronous requirement issue.
     # BUG FIX 13: Missing @staticmethod and @tool decorator.
     @staticmethod
+    @keep_defaults
     @tool("Create Risk Assessment")
-    def create_risk_assessment_tool(financial_document_data: str) -> str:
-        """Perform a risk assessment on extracted financial document text.
+    def create_risk_assessment_tool(path: str = "data/sample.pdf") -> str:
+        """Score the document's risks with deterministic rules and return a risk register.
+
+        Combines risk-factor language found in the text (liquidity, credit,
+        market, operational, regulatory) with threshold rules on leverage,
+        liquidity and cash burn computed from the financial statements. Each
+        category is rated Low / Medium / High with its reasons and evidence
+        quoted at character offsets in the document.
 
         Args:
-            financial_document_data (str): Raw text extracted from a financial PDF.
+            path (str): Path of the PDF file. Defaults to 'data/sample.pdf'.
 
         Returns:
-            str: Risk assessment output based on the financial data.
+            str: Overall risk profile and the risk register.
         """
-        if not financial_document_data:
-            return "Error: No financial data provided for risk assessment."
-
-        # TODO: Implement risk scoring, flag high-debt ratios, low liquidity, etc.
-        return "Risk assessment functionality to be implemented"
\ No newline at end of file
+        document = get_document(path)
+        with document.span("tool:risk_assessment"):
+            table = document.financial_table()
+            if table is None:
+                return document.load()  # the error or warning explaining why there is no text
+            register = document.derive("risk_register", lambda text: assess_risk(text, table))
+            return format_register(register)
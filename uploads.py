@@ -0,0 +1,336 @@
+## Importing libraries and files
+import hashlib
+import json
+import os
+import uuid
+import zipfile
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+MAX_UPLOAD_BYTES = int(os.getenv("ANALYZER_MAX_UPLOAD_MB", "200")) * 1024 * 1024
+CHUNK_SIZE = int(os.getenv("ANALYZER_UPLOAD_CHUNK_KB", "1024")) * 1024
+MAX_BATCH_DOCUMENTS = int(os.getenv("ANALYZER_BATCH_MAX_DOCUMENTS", "500"))
+MAX_ZIP_BYTES = int(os.getenv("ANALYZER_MAX_ZIP_MB", "2048")) * 1024 * 1024
+# Total size of the documents one batch request may write to disk, after decompression.
+MAX_BATCH_EXTRACTED_BYTES = int(os.getenv("ANALYZER_BATCH_MAX_EXTRACTED_MB", "4096")) * 1024 * 1024
+MAX_BATCH_REQUEST_BYTES = int(os.getenv("ANALYZER_MAX_BATCH_REQUEST_MB", "2048")) * 1024 * 1024
+# Room for the multipart boundaries, part headers and form fields around the file.
+MULTIPART_OVERHEAD = 64 * 1024
+
+# The PDF spec allows the "%PDF-" header anywhere in the first 1024 bytes.
+PDF_MAGIC = b"%PDF-"
+ZIP_MAGIC = b"PK\x03\x04"
+HEADER_WINDOW = 1024
+
+
+class UploadRejected(Exception):
+    """Raised when an upload is refused while it is being received.
+
+    Attributes:
+        status_code (int): HTTP status to answer with (413 or 415).
+        detail (str): Human-readable reason.
+    """
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+## Creating the request size limit
+class RequestSizeLimit:
+    """ASGI middleware that refuses oversized upload requests before they are parsed.
+
+    Starlette reads the whole multipart body into a temporary file before a
+    route handler runs, so the handler's size check comes too late to save
+    the transfer. This middleware answers 413 as soon as the request's
+    ``Content-Length`` exceeds the route's limit, and counts the body as it
+    arrives for requests without one (chunked) or with a wrong one.
+
+    Args:
+        app: The wrapped ASGI application.
+        limits (dict): Maximum request body size in bytes, by ``POST`` path.
+    """
+
+    def __init__(self, app: ASGIApp, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limit = self.limits.get(scope["path"]) if scope["type"] == "http" and scope["method"] == "POST" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        try:
+            declared = int(headers.get(b"content-length", b"0"))
+        except ValueError:
+            declared = 0
+        if declared > limit:
+            await self._reject(send, limit)
+            return
+
+        received = 0
+        overflowed = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, overflowed
+            if overflowed:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # End the body here; the app's parse error is replaced by a 413 below.
+                    overflowed = True
+                    return {"type": "http.request", "body": b"", "more_body": False}
+            return message
+
+        async def limited_send(message: Message) -> None:
+            if not overflowed:
+                await send(message)
+
+        await self.app(scope, limited_receive, limited_send)
+        if overflowed:
+            await self._reject(send, limit)
+
+    @staticmethod
+    async def _reject(send: Send, limit: int) -> None:
+        body = json.dumps({"detail": f"Request exceeds the {limit // (1024 * 1024)} MB upload limit"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+class SavedUpload(NamedTuple):
+    path: str
+    size: int
+    sha256: str
+
+
+def new_upload_path(data_dir: str = "data") -> str:
+    """Unique path for a document written to the data directory."""
+    return os.path.join(data_dir, f"financial_document_{uuid.uuid4()}.pdf")
+
+
+class _UploadSink:
+    """Writes a file chunk by chunk, checking its header and size and hashing it."""
+
+    def __init__(self, file_path: str, max_bytes: int, magic: bytes, kind: str):
+        self.file_path = file_path
+        self.max_bytes = max_bytes
+        self.magic = magic
+        self.kind = kind
+        self.size = 0
+        self.digest = hashlib.sha256()
+        self._file = open(file_path, "wb")
+
+    def write(self, chunk: bytes) -> None:
+        if self.size == 0 and self.magic not in chunk[:HEADER_WINDOW]:
+            raise UploadRejected(415, f"Uploaded file is not a {self.kind} document")
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise UploadRejected(
+                413, f"Uploaded file exceeds the {self.max_bytes // (1024 * 1024)} MB limit"
+            )
+        self.digest.update(chunk)
+        self._file.write(chunk)
+
+    def close(self) -> SavedUpload:
+        self._file.close()
+        if self.size == 0:
+            raise UploadRejected(415, "Uploaded file is empty")
+        return SavedUpload(self.file_path, self.size, self.digest.hexdigest())
+
+    def abort(self) -> None:
+        self._file.close()
+        if os.path.exists(self.file_path):
+            os.remove(self.file_path)
+
+
+async def save_upload(
+    upload: UploadFile,
+    file_path: str,
+    max_bytes: int = MAX_UPLOAD_BYTES,
+    chunk_size: int = CHUNK_SIZE,
+    magic: bytes = PDF_MAGIC,
+) -> SavedUpload:
+    """Stream an upload to disk chunk by chunk.
+
+    Only one chunk is held in memory at a time. The file header is checked on
+    the first chunk and the size limit on every chunk, so a bad upload stops
+    being copied as soon as it is detected; the SHA-256 used by the document
+    cache is computed in the same pass. A partially written file is removed
+    on rejection. The request as a whole is bounded earlier, before it is
+    parsed, by :class:`RequestSizeLimit`.
+
+    Args:
+        upload (UploadFile): The incoming multipart file.
+        file_path (str): Destination path.
+        max_bytes (int): Maximum accepted size.
+        chunk_size (int): Bytes read and written per step.
+        magic (bytes): Header the file must start with (PDF by default).
+
+    Returns:
+        SavedUpload: Path, size in bytes and SHA-256 hex digest of the file.
+
+    Raises:
+        UploadRejected: If the file has the wrong type or exceeds ``max_bytes``.
+    """
+    sink = _UploadSink(file_path, max_bytes, magic, "ZIP" if magic == ZIP_MAGIC else "PDF")
+    try:
+        while True:
+            chunk = await upload.read(chunk_size)
+            if not chunk:
+                break
+            await run_in_threadpool(sink.write, chunk)
+        return sink.close()
+    except BaseException:
+        sink.abort()
+        raise
+
+
+class BatchBudget:
+    """What one batch request may still write to the data directory.
+
+    Shared by every file of the request, so several archives together get a
+    single allowance of documents and decompressed bytes rather than one each.
+
+    Attributes:
+        documents (int): Documents that may still be saved.
+        bytes (int): Bytes that may still be written.
+    """
+
+    def __init__(self, documents: int = MAX_BATCH_DOCUMENTS, max_bytes: int = MAX_BATCH_EXTRACTED_BYTES):
+        self.documents = documents
+        self.bytes = max_bytes
+        self._max_documents = documents
+        self._max_bytes = max_bytes
+
+    def refusal(self, size: int = 0) -> Optional[str]:
+        """Why a document of at least ``size`` bytes cannot be saved, or None."""
+        if self.documents <= 0:
+            return f"Batch is limited to {self._max_documents} documents"
+        if self.bytes <= 0 or size > self.bytes:
+            return self.over_bytes
+        return None
+
+    @property
+    def over_bytes(self) -> str:
+        return f"Batch exceeds the {self._max_bytes // (1024 * 1024)} MB limit on extracted documents"
+
+    def take(self, upload: SavedUpload) -> None:
+        self.documents -= 1
+        self.bytes -= upload.size
+
+    def exhaust(self) -> None:
+        # A document ran past the remaining bytes; nothing more fits.
+        self.bytes = 0
+
+
+def is_zip_upload(upload: UploadFile) -> bool:
+    """Whether a batch upload should be treated as a ZIP archive of PDFs."""
+    content_type = (upload.content_type or "").lower()
+    return (upload.filename or "").lower().endswith(".zip") or "zip" in content_type
+
+
+def extract_zip_pdfs(
+    zip_path: str,
+    data_dir: str = "data",
+    max_bytes: int = MAX_UPLOAD_BYTES,
+    budget: Optional[BatchBudget] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> Tuple[List[Tuple[str, SavedUpload]], List[Tuple[str, str]]]:
+    """Unpack the PDFs of a ZIP archive into the data directory.
+
+    Members are streamed out one chunk at a time with the same header and
+    size checks as direct uploads, so a compressed archive cannot expand
+    past the limits. Every member saved is taken from ``budget``; once it
+    is used up, the remaining members are rejected without being extracted.
+
+    Returns:
+        tuple: ``(saved, rejected)`` — ``(member name, SavedUpload)`` pairs and
+        ``(member name, reason)`` pairs.
+    """
+    budget = budget if budget is not None else BatchBudget()
+    saved: List[Tuple[str, SavedUpload]] = []
+    rejected: List[Tuple[str, str]] = []
+    with zipfile.ZipFile(zip_path) as archive:
+        for info in archive.infolist():
+            if info.is_dir() or os.path.basename(info.filename).startswith("."):
+                continue
+            if not info.filename.lower().endswith(".pdf"):
+                rejected.append((info.filename, "Not a PDF file"))
+                continue
+            # The declared size is checked up front; the streamed size below
+            # is what counts, as the header can understate it.
+            refusal = budget.refusal(min(info.file_size, max_bytes + 1))
+            if refusal:
+                rejected.append((info.filename, refusal))
+                continue
+            limit = min(max_bytes, budget.bytes)
+            sink = _UploadSink(new_upload_path(data_dir), limit, PDF_MAGIC, "PDF")
+            try:
+                with archive.open(info) as member:
+                    for chunk in iter(lambda: member.read(chunk_size), b""):
+                        sink.write(chunk)
+                upload = sink.close()
+            except (UploadRejected, zipfile.BadZipFile, OSError) as e:
+                sink.abort()
+                reason = getattr(e, "detail", str(e))
+                if limit < max_bytes and sink.size > limit:
+                    reason = budget.over_bytes
+                    budget.exhaust()
+                rejected.append((info.filename, reason))
+                continue
+            budget.take(upload)
+            saved.append((info.filename, upload))
+    return saved, rejected
+
+
+async def save_batch_upload(
+    upload: UploadFile, budget: BatchBudget, data_dir: str = "data"
+) -> Tuple[List[Tuple[str, SavedUpload]], List[Tuple[str, str]]]:
+    """Save one part of a batch request: a PDF, or a ZIP archive of PDFs.
+
+    Args:
+        upload (UploadFile): The part.
+        budget (BatchBudget): Documents and bytes the request may still save,
+            shared by all of its parts.
+        data_dir (str): Directory the documents are written to.
+
+    Returns:
+        tuple: ``(saved, rejected)`` as for :func:`extract_zip_pdfs`.
+    """
+    name = upload.filename or "upload"
+    refusal = budget.refusal()
+    if refusal:
+        return [], [(name, refusal)]
+    if not is_zip_upload(upload):
+        limit = min(MAX_UPLOAD_BYTES, budget.bytes)
+        try:
+            saved = await save_upload(upload, new_upload_path(data_dir), max_bytes=limit)
+        except UploadRejected as e:
+            if e.status_code == 413 and limit < MAX_UPLOAD_BYTES:
+                budget.exhaust()
+                return [], [(name, budget.over_bytes)]
+            return [], [(name, e.detail)]
+        budget.take(saved)
+        return [(name, saved)], []
+
+    zip_path = os.path.join(data_dir, f"batch_{uuid.uuid4()}.zip")
+    try:
+        await save_upload(upload, zip_path, max_bytes=MAX_ZIP_BYTES, magic=ZIP_MAGIC)
+        return await run_in_threadpool(extract_zip_pdfs, zip_path, data_dir, budget=budget)
+    except (UploadRejected, zipfile.BadZipFile) as e:
+        return [], [(name, getattr(e, "detail", str(e)))]
+    finally:
+        if os.path.exists(zip_path):
+            os.remove(zip_path)